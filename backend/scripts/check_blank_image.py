@@ -4,16 +4,22 @@
 import sys
 from PIL import Image
 import numpy as np
+from contextlib import nullcontext
 
-def is_blank_image(image_path, threshold=0.95, min_width=500, min_height=400):
+from timing import StageTimer
+
+def is_blank_image(image_path, threshold=0.95, min_width=500, min_height=400, timer=None):
     """
     Vérifie si une image est blanche/uniforme ou trop petite (logo)
     threshold: pourcentage de pixels similaires pour considérer l'image comme blanche (0.95 = 95%)
     min_width: largeur minimale pour une image de cover (évite les logos)
     min_height: hauteur minimale pour une image de cover (évite les logos)
+    timer: StageTimer optionnel pour mesurer chaque étape
     """
+    stage = timer.stage if timer else (lambda name: nullcontext())
     try:
-        img = Image.open(image_path)
+        with stage("image_open"):
+            img = Image.open(image_path)
 
         # Vérifier la taille de l'image (filtrer les logos qui sont souvent petits)
         width, height = img.size
@@ -28,14 +34,16 @@ def is_blank_image(image_path, threshold=0.95, min_width=500, min_height=400):
             return True
 
         # Convertir en niveaux de gris pour simplifier
-        img_gray = img.convert('L')
+        with stage("image_decode"):
+            img_gray = img.convert('L')
 
-        # Convertir en array numpy
-        img_array = np.array(img_gray)
+            # Convertir en array numpy
+            img_array = np.array(img_gray)
 
         # Calculer la variance (mesure de la dispersion des pixels)
         # Une variance faible = image uniforme
-        variance = np.var(img_array)
+        with stage("pixel_stats"):
+            variance = np.var(img_array)
 
         # Une variance < 100 indique généralement une image très uniforme
         if variance < 100:
@@ -43,9 +51,10 @@ def is_blank_image(image_path, threshold=0.95, min_width=500, min_height=400):
             return True
 
         # Vérifier si la plupart des pixels sont blancs (> 240)
-        white_pixels = np.sum(img_array > 240)
-        total_pixels = img_array.size
-        white_ratio = white_pixels / total_pixels
+        with stage("pixel_stats"):
+            white_pixels = np.sum(img_array > 240)
+            total_pixels = img_array.size
+            white_ratio = white_pixels / total_pixels
 
         if white_ratio > threshold:
             print(f"BLANK:{white_ratio}")
@@ -64,5 +73,7 @@ if __name__ == '__main__':
         sys.exit(1)
 
     image_path = sys.argv[1]
-    is_blank = is_blank_image(image_path)
+    timer = StageTimer("check_blank_image")
+    is_blank = is_blank_image(image_path, timer=timer)
+    timer.emit()
     sys.exit(0 if is_blank else 1)
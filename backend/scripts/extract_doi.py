@@ -4,6 +4,7 @@ Script d'extraction de DOI depuis un fichier PDF
 Utilise PyPDF2 pour extraire le texte et rechercher un DOI
 """
 
+import os
 import sys
 import json
 import re
@@ -11,6 +12,11 @@ import PyPDF2
 import requests
 from pathlib import Path
 
+from timing import StageTimer
+
+# API CrossRef (surchargeable, par exemple vers un serveur local pour les benchmarks)
+CROSSREF_API_URL = os.environ.get("CROSSREF_API_URL", "https://api.crossref.org").rstrip("/")
+
 def extract_text_from_pdf(pdf_path):
     """Extrait le texte d'un fichier PDF"""
     try:
@@ -63,7 +69,7 @@ def validate_doi(doi):
 def fetch_doi_metadata(doi):
     """Récupère les métadonnées d'un DOI via l'API CrossRef"""
     try:
-        url = f"https://api.crossref.org/works/{doi}"
+        url = f"{CROSSREF_API_URL}/works/{doi}"
         headers = {
             'Accept': 'application/json',
             'User-Agent': 'FormPaper3001/1.0 (mailto:user@example.com)'
@@ -136,24 +142,32 @@ def main():
         print(f"Fichier non trouvé: {pdf_path}", file=sys.stderr)
         sys.exit(1)
 
+    timer = StageTimer("extract_doi")
+
     # Extraire le texte du PDF
-    text = extract_text_from_pdf(pdf_path)
+    with timer.stage("pdf_text"):
+        text = extract_text_from_pdf(pdf_path)
 
     if not text:
         print("Impossible d'extraire le texte du PDF", file=sys.stderr)
+        timer.emit()
         sys.exit(1)
 
     # Rechercher le DOI
-    doi = find_doi_in_text(text)
+    with timer.stage("doi_search"):
+        doi = find_doi_in_text(text)
 
     if not doi:
         print("Aucun DOI trouvé dans le PDF", file=sys.stderr)
+        timer.emit()
         sys.exit(1)
 
     # Récupérer les métadonnées
-    metadata = fetch_doi_metadata(doi)
+    with timer.stage("crossref"):
+        metadata = fetch_doi_metadata(doi)
 
     if metadata:
+        metadata['timings'] = timer.to_dict()
         print(json.dumps(metadata, ensure_ascii=False, indent=2))
     else:
         # Retourner au moins le DOI trouvé
@@ -163,7 +177,8 @@ def main():
             'publication_date': '',
             'conference': '',
             'doi': doi,
-            'url': f"https://doi.org/{doi}"
+            'url': f"https://doi.org/{doi}",
+            'timings': timer.to_dict()
         }
         print(json.dumps(result, ensure_ascii=False, indent=2))
 
@@ -8,18 +8,23 @@ import os
 import sys
 import fitz  # PyMuPDF
 import json
+from contextlib import nullcontext
 
-def extract_images_from_pdf(pdf_path, output_folder):
+from timing import StageTimer
+
+def extract_images_from_pdf(pdf_path, output_folder, timer=None):
     """
     Extrait toutes les images d'un fichier PDF
     
     Args:
         pdf_path (str): Chemin vers le fichier PDF
         output_folder (str): Dossier où sauvegarder les images
+        timer (StageTimer, optionnel): Mesure la durée de chaque étape
         
     Returns:
         list: Liste des chemins des images extraites
     """
+    stage = timer.stage if timer else (lambda name: nullcontext())
     try:
         # Créer le dossier de sortie s'il n'existe pas
         if not os.path.exists(output_folder):
@@ -31,7 +36,8 @@ def extract_images_from_pdf(pdf_path, output_folder):
             return []
 
         # Ouvrir le fichier PDF
-        doc = fitz.open(pdf_path)
+        with stage("pdf_open"):
+            doc = fitz.open(pdf_path)
         extracted_images = []
 
         # Parcourir chaque page du PDF
@@ -43,7 +49,8 @@ def extract_images_from_pdf(pdf_path, output_folder):
             for img_index, img in enumerate(image_list):
                 try:
                     xref = img[0]
-                    base_image = doc.extract_image(xref)
+                    with stage("image_extract"):
+                        base_image = doc.extract_image(xref)
                     image_bytes = base_image["image"]
                     image_ext = base_image["ext"]
 
@@ -52,7 +59,7 @@ def extract_images_from_pdf(pdf_path, output_folder):
                     output_path = os.path.join(output_folder, filename)
 
                     # Sauvegarder l'image
-                    with open(output_path, "wb") as image_file:
+                    with stage("image_write"), open(output_path, "wb") as image_file:
                         image_file.write(image_bytes)
 
                     # Vérifier que l'image n'est pas trop petite (éviter les icônes, etc.)
@@ -90,7 +97,10 @@ def main():
     pdf_path = sys.argv[1]
     output_folder = sys.argv[2]
 
-    extracted_images = extract_images_from_pdf(pdf_path, output_folder)
+    # La sortie standard reste un tableau JSON : les durées vont sur stderr
+    timer = StageTimer("extract_images")
+    extracted_images = extract_images_from_pdf(pdf_path, output_folder, timer)
+    timer.emit()
 
     if extracted_images:
         # Retourner la liste des images au format JSON sur stdout
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Mesure de la durée des étapes des scripts Python (ouverture du PDF,
+extraction, requête CrossRef...).
+
+Les durées sont rendues en JSON, soit dans la sortie du script quand elle
+est un objet, soit sur stderr (ligne préfixée par TIMINGS:) quand la sortie
+doit rester inchangée pour le backend Node.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Durées cumulées par étape, en millisecondes"""
+
+    def __init__(self, script):
+        self.script = script
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 2)
+
+    def to_dict(self):
+        return {
+            "script": self.script,
+            "stages_ms": dict(self.stages),
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 2)
+        }
+
+    def emit(self):
+        """Écrit les durées sur stderr, sans toucher à stdout"""
+        print("TIMINGS:" + json.dumps(self.to_dict()), file=sys.stderr)
@@ -0,0 +1,161 @@
+"""
+Synthetic PDFs and images for the benchmarks, generated with PyMuPDF.
+
+Everything is derived from fixed seeds, so two runs (or two machines) time
+exactly the same documents: same page count, same images, same text, same
+DOI placement.
+"""
+
+import random
+from pathlib import Path
+from typing import List
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+WORDS = (
+    "model retrieval paper dataset evaluation baseline embedding attention layer "
+    "results method training inference latency throughput figure table section "
+    "analysis corpus annotation accuracy precision recall benchmark learning "
+    "network representation query document index chunk context answer citation "
+    "experiment ablation study participants interface design visualization user"
+).split()
+
+# name, pages, distinct images per page, repeated logo on every page, DOI and how it is written
+PDF_SPECS = [
+    {"name": "short", "pages": 2, "images_per_page": 1, "logo": False,
+     "doi": "10.1145/3290605.3300001", "doi_style": "prefix"},
+    {"name": "article", "pages": 12, "images_per_page": 2, "logo": True,
+     "doi": "10.1109/TVCG.2021.3114850", "doi_style": "url"},
+    {"name": "long", "pages": 40, "images_per_page": 3, "logo": True,
+     "doi": "10.48550/arXiv.2301.00001", "doi_style": "bare"},
+    {"name": "no_doi", "pages": 6, "images_per_page": 0, "logo": True,
+     "doi": None, "doi_style": None},
+]
+
+# name, width, height, pattern, expected is_blank_image result
+IMAGE_SPECS = [
+    {"name": "figure", "width": 1600, "height": 1000, "pattern": "photo", "blank": False},
+    {"name": "blank_page", "width": 1240, "height": 1754, "pattern": "white", "blank": True},
+    {"name": "sparse_page", "width": 1240, "height": 1754, "pattern": "lines", "blank": True},
+    {"name": "small_logo", "width": 200, "height": 120, "pattern": "photo", "blank": True},
+    {"name": "square_logo", "width": 800, "height": 800, "pattern": "photo", "blank": True},
+]
+
+QUICK_MAX_PAGES = 12
+
+
+def make_png(width: int, height: int, pattern: str, seed: int) -> bytes:
+    """PNG bytes of a deterministic image ('photo', 'white' or 'lines')"""
+    import fitz
+
+    if pattern == "white":
+        samples = bytes([255]) * (width * height * 3)
+    elif pattern == "lines":
+        white_row = bytes([255]) * (width * 3)
+        dark_row = bytes([30]) * (width * 3)
+        samples = b"".join(dark_row if y % 97 == 0 else white_row for y in range(height))
+    else:
+        # Bands of shifted copies of one random row: textured like a figure,
+        # cheap to generate, and compressible enough to keep the PDFs small
+        rng = random.Random(seed)
+        base = rng.randbytes(width * 3)
+        rows = []
+        for y in range(height):
+            shift = ((y // 8) * 21) % len(base)
+            rows.append(base[shift:] + base[:shift])
+        samples = b"".join(rows)
+
+    pixmap = fitz.Pixmap(fitz.csRGB, width, height, samples, 0)
+    return pixmap.tobytes("png")
+
+
+def page_text(rng: random.Random, words: int) -> str:
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def doi_line(doi: str, style: str) -> str:
+    if style == "url":
+        return f"https://doi.org/{doi}"
+    if style == "bare":
+        return f"Available online: {doi}"
+    return f"DOI: {doi}"
+
+
+def make_pdf(path: Path, spec: dict, seed: int = 0):
+    """Write one synthetic article described by a PDF_SPECS entry"""
+    import fitz
+
+    rng = random.Random(f"{spec['name']}-{seed}")
+    doc = fitz.open()
+    logo_xref = 0
+    logo_png = make_png(160, 160, "photo", seed + 1) if spec["logo"] else None
+
+    for page_number in range(spec["pages"]):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        top = MARGIN
+
+        # Same logo object on every page, as in publisher templates
+        if logo_png:
+            logo_rect = fitz.Rect(PAGE_WIDTH - MARGIN - 40, 15, PAGE_WIDTH - MARGIN, 55)
+            logo_xref = page.insert_image(logo_rect, stream=logo_png) if not logo_xref \
+                else page.insert_image(logo_rect, xref=logo_xref)
+
+        if page_number == 0:
+            title = f"Synthetic benchmark article {spec['name']}"
+            page.insert_text((MARGIN, top + 20), title, fontsize=16)
+            if spec["doi"]:
+                page.insert_text((MARGIN, top + 45), doi_line(spec["doi"], spec["doi_style"]), fontsize=9)
+            top += 70
+
+        count = spec["images_per_page"]
+        if count:
+            width = (PAGE_WIDTH - 2 * MARGIN) / count
+            for i in range(count):
+                png = make_png(480, 300, "photo", seed + page_number * 31 + i + 2)
+                rect = fitz.Rect(MARGIN + i * width + 4, top, MARGIN + (i + 1) * width - 4, top + 170)
+                page.insert_image(rect, stream=png)
+            top += 185
+
+        text_rect = fitz.Rect(MARGIN, top, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN)
+        page.insert_textbox(text_rect, page_text(rng, 300), fontsize=9)
+
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+
+
+def expected_image_count(spec: dict) -> int:
+    """Images extract_images_from_pdf should return (the logo once per page)"""
+    return spec["pages"] * spec["images_per_page"] + (spec["pages"] if spec["logo"] else 0)
+
+
+def pdf_specs(quick: bool = False) -> List[dict]:
+    if quick:
+        return [spec for spec in PDF_SPECS if spec["pages"] <= QUICK_MAX_PAGES]
+    return list(PDF_SPECS)
+
+
+def build_corpus(directory: Path, quick: bool = False, seed: int = 0) -> dict:
+    """Generate PDFs and images in `directory`; returns {"pdfs": [...], "images": [...]}"""
+    directory.mkdir(parents=True, exist_ok=True)
+    pdfs = []
+    for spec in pdf_specs(quick):
+        path = directory / f"{spec['name']}.pdf"
+        make_pdf(path, spec, seed)
+        pdfs.append(dict(spec, path=str(path)))
+
+    images = []
+    for i, spec in enumerate(IMAGE_SPECS):
+        path = directory / f"{spec['name']}.png"
+        path.write_bytes(make_png(spec["width"], spec["height"], spec["pattern"], seed + 100 + i))
+        images.append(dict(spec, path=str(path)))
+
+    return {"pdfs": pdfs, "images": images}
@@ -0,0 +1,160 @@
+"""
+Deterministic stand-ins for the network and the models, so benchmarks run
+offline and time only our own code paths.
+
+- hashed_embedding: bag-of-words hashed into a fixed-size unit vector
+- llama_hash_embedding / llama_fake_llm: LlamaIndex models for app.py
+- paperqa_fake_clients: PaperQA settings for api.py, with litellm mock
+  responses and PaperQA's sparse (hashing) embeddings
+- CrossRefStub: local HTTP server answering /works/{doi} like CrossRef
+- ConnectedClient: request of a streaming endpoint whose client stays connected
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import unquote
+
+EMBED_DIMENSIONS = 384
+
+FAKE_ANSWER = (
+    "The synthetic article evaluates a retrieval model on a benchmark corpus "
+    "and reports latency and accuracy results for each method."
+)
+FAKE_SUMMARY = json.dumps({
+    "summary": "The excerpt describes the evaluation of a retrieval model on a benchmark corpus.",
+    "relevance_score": 7
+})
+
+
+def hashed_embedding(text: str, dimensions: int = EMBED_DIMENSIONS) -> List[float]:
+    """Deterministic embedding: signed word hashes, L2-normalised"""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def llama_hash_embedding(embed_batch_size: int = 32, dimensions: int = EMBED_DIMENSIONS):
+    """LlamaIndex embedding model backed by hashed_embedding"""
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+
+    class HashEmbedding(BaseEmbedding):
+        @classmethod
+        def class_name(cls) -> str:
+            return "HashEmbedding"
+
+        def _get_query_embedding(self, query: str) -> List[float]:
+            return hashed_embedding(query, dimensions)
+
+        async def _aget_query_embedding(self, query: str) -> List[float]:
+            return hashed_embedding(query, dimensions)
+
+        def _get_text_embedding(self, text: str) -> List[float]:
+            return hashed_embedding(text, dimensions)
+
+    return HashEmbedding(model_name="hash-embedding", embed_batch_size=embed_batch_size)
+
+
+def llama_fake_llm(max_tokens: int = 64):
+    """LlamaIndex LLM returning a fixed-length answer without any network call"""
+    from llama_index.core.llms import MockLLM
+    return MockLLM(max_tokens=max_tokens)
+
+
+def _litellm_config(name: str, response: str) -> dict:
+    return {
+        "model_list": [{
+            "model_name": name,
+            "litellm_params": {"model": f"openai/{name}", "mock_response": response, "api_key": "offline"}
+        }]
+    }
+
+
+def paperqa_fake_clients(paperqa, model: str) -> dict:
+    """Same shape as api.get_clients, with mocked LLMs and sparse embeddings"""
+    llm_name = f"fake-{model}"
+    summary_name = f"fake-summary-{model}"
+    settings = paperqa.Settings(
+        llm=llm_name,
+        llm_config=_litellm_config(llm_name, FAKE_ANSWER),
+        summary_llm=summary_name,
+        summary_llm_config=_litellm_config(summary_name, FAKE_SUMMARY),
+        embedding="sparse",
+        temperature=0.0,
+        parsing={"use_doc_details": False}
+    )
+    return {
+        "settings": settings,
+        "llm_model": settings.get_llm(),
+        "summary_llm_model": settings.get_summary_llm(),
+        "embedding_model": settings.get_embedding_model()
+    }
+
+
+def crossref_work(doi: str) -> dict:
+    """A CrossRef /works response whose fields derive from the DOI"""
+    seed = int(hashlib.sha1(doi.encode("utf-8")).hexdigest()[:8], 16)
+    return {
+        "status": "ok",
+        "message-type": "work",
+        "message": {
+            "DOI": doi,
+            "title": [f"Synthetic article {seed % 10000}"],
+            "author": [
+                {"given": "Ada", "family": f"Author{seed % 97}"},
+                {"given": "Alan", "family": f"Author{seed % 89}"}
+            ],
+            "published-print": {"date-parts": [[2020 + seed % 5, 1 + seed % 12, 1 + seed % 28]]},
+            "container-title": ["Proceedings of the Synthetic Benchmark Conference"],
+            "URL": f"https://doi.org/{doi}"
+        }
+    }
+
+
+class _CrossRefHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        prefix = "/works/"
+        if not self.path.startswith(prefix):
+            self.send_error(404)
+            return
+        body = json.dumps(crossref_work(unquote(self.path[len(prefix):]))).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CrossRefStub:
+    """Local CrossRef API on 127.0.0.1 (random port), usable as a context manager"""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _CrossRefHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="crossref-stub", daemon=True)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ConnectedClient:
+    """Stand-in for the Starlette Request of the streaming endpoints"""
+
+    async def is_disconnected(self) -> bool:
+        return False
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark harness for the PDF scripts and the RAG services.
+
+Generates a synthetic corpus, times every suite in suites.py, writes the
+results as JSON and compares medians with a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py                     # all suites
+    python benchmarks/run_benchmarks.py --suite doi --suite extract_images
+    python benchmarks/run_benchmarks.py --quick             # small corpus, 3 runs
+    python benchmarks/run_benchmarks.py --save-baseline     # store as the new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import build_corpus  # noqa: E402
+from suites import SUITES, SuiteSkipped, quiet as quiet_output  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_OUTPUT = BENCH_DIR / "results.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+PACKAGES = ["pymupdf", "PyPDF2", "pillow", "numpy", "requests", "pypdf", "llama-index-core",
+            "paper-qa", "litellm", "fastapi"]
+
+
+class BenchmarkRun:
+    """Collects timings and correctness checks of one run"""
+
+    def __init__(self, repeat: int = 5, warmup: int = 1):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results = {}
+        self.checks = {}
+        self.suites = {}
+
+    def measure(self, name: str, func, params: dict = None, setup=None, quiet: bool = False):
+        """Time `func` over `repeat` runs after `warmup` untimed ones; returns its last result"""
+        samples = []
+        result = None
+        for i in range(self.warmup + self.repeat):
+            if setup:
+                setup()
+            with quiet_output() if quiet else nullcontext():
+                start = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed * 1000)
+
+        self.results[name] = {
+            "params": params or {},
+            "runs": len(samples),
+            "median_ms": round(statistics.median(samples), 3),
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3),
+            "stdev_ms": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0
+        }
+        return result
+
+    def check(self, name: str, passed: bool, detail: str = ""):
+        self.checks[name] = {"passed": bool(passed), "detail": detail}
+
+    def run_suite(self, name: str, suite, corpus: dict, workdir: Path):
+        start = time.perf_counter()
+        try:
+            suite(self, corpus, workdir / name)
+            self.suites[name] = {"status": "ok"}
+        except SuiteSkipped as e:
+            self.suites[name] = {"status": "skipped", "reason": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            self.suites[name] = {"status": "failed", "reason": f"{type(e).__name__}: {e}"}
+        self.suites[name]["seconds"] = round(time.perf_counter() - start, 2)
+
+
+def environment() -> dict:
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> dict:
+    """Median of each case against the baseline; slower than 1 + tolerance is a regression"""
+    cases = {}
+    base_results = baseline.get("results", {})
+    for name in sorted(set(results) | set(base_results)):
+        current = results.get(name)
+        previous = base_results.get(name)
+        if current is None:
+            cases[name] = {"status": "missing", "baseline_ms": previous["median_ms"]}
+            continue
+        if previous is None:
+            cases[name] = {"status": "new", "current_ms": current["median_ms"]}
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        if ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 - tolerance:
+            status = "improvement"
+        else:
+            status = "ok"
+        cases[name] = {
+            "status": status,
+            "baseline_ms": previous["median_ms"],
+            "current_ms": current["median_ms"],
+            "ratio": round(ratio, 3)
+        }
+
+    summary = {}
+    for case in cases.values():
+        summary[case["status"]] = summary.get(case["status"], 0) + 1
+    return {"tolerance": tolerance, "summary": summary, "cases": cases}
+
+
+def print_report(report: dict):
+    width = max([len(name) for name in report["results"]] + [20])
+    comparison = report.get("comparison")
+    print(f"\n{'case':<{width}}  {'median ms':>10}  {'baseline':>10}  {'ratio':>6}  status")
+    for name, result in sorted(report["results"].items()):
+        case = comparison["cases"].get(name, {}) if comparison else {}
+        baseline_ms = f"{case['baseline_ms']:.2f}" if "baseline_ms" in case else "-"
+        ratio = f"{case['ratio']:.2f}" if "ratio" in case else "-"
+        print(f"{name:<{width}}  {result['median_ms']:>10.2f}  {baseline_ms:>10}  {ratio:>6}  {case.get('status', '')}")
+
+    failed_checks = [name for name, check in report["checks"].items() if not check["passed"]]
+    for name in failed_checks:
+        print(f"CHECK FAILED {name}: {report['checks'][name]['detail']}")
+    for name, suite in report["suites"].items():
+        if suite["status"] != "ok":
+            print(f"suite {name}: {suite['status']} ({suite.get('reason', '')})")
+    if comparison:
+        print(f"comparison (tolerance {comparison['tolerance']:.0%}): {comparison['summary']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for FormPaper3001")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="suite to run (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=None, help="timed runs per case (default 5, 3 with --quick)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per case")
+    parser.add_argument("--quick", action="store_true", help="skip the largest PDFs")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="results file (JSON)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown of a median before it counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 on regressions or failed checks")
+    parser.add_argument("--workdir", type=Path, default=None,
+                        help="where to generate the corpus and indexes (default: temporary directory)")
+    args = parser.parse_args()
+
+    repeat = args.repeat or (3 if args.quick else 5)
+    run = BenchmarkRun(repeat=repeat, warmup=args.warmup)
+    names = args.suite or list(SUITES)
+
+    with tempfile.TemporaryDirectory(prefix="formpaper-bench-") as tmp:
+        workdir = args.workdir or Path(tmp)
+        try:
+            corpus = build_corpus(workdir / "corpus", quick=args.quick)
+        except ImportError as e:
+            print(f"Cannot generate the synthetic corpus (PyMuPDF required): {e}", file=sys.stderr)
+            sys.exit(2)
+
+        for name in names:
+            print(f"[bench] {name}...", file=sys.stderr)
+            run.run_suite(name, SUITES[name], corpus, workdir)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": {"repeat": repeat, "warmup": args.warmup, "quick": args.quick, "suites": names},
+        "suites": run.suites,
+        "results": run.results,
+        "checks": run.checks
+    }
+
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(run.results, baseline, args.tolerance)
+        if baseline.get("environment", {}).get("machine") != report["environment"]["machine"] or \
+                baseline.get("environment", {}).get("cpu_count") != report["environment"]["cpu_count"]:
+            print("Note: baseline was recorded on a different machine", file=sys.stderr)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"\nResults written to {args.output}")
+
+    failed = any(not check["passed"] for check in run.checks.values()) or \
+        any(suite["status"] == "failed" for suite in run.suites.values())
+    regressed = report.get("comparison", {}).get("summary", {}).get("regression", 0) > 0
+    if args.fail_on_regression and (failed or regressed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Benchmark suites. Each one times a hot path on the synthetic corpus and
+records correctness checks next to the timings, so a "faster" change that
+breaks extraction shows up too.
+
+Suites call the real code (backend scripts, app.py, api.py); only the
+models and CrossRef are replaced by the deterministic fakes in fakes.py.
+"""
+
+import asyncio
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import fakes
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "backend" / "scripts"
+SERVICE_DIR = ROOT / "paperqa-service"
+
+QUESTION = "Which retrieval model is evaluated and what latency results are reported?"
+
+
+class SuiteSkipped(Exception):
+    """A suite cannot run in this environment (missing dependency)"""
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        # Parent package of a dotted name is missing
+        return False
+
+
+def require(*modules: str):
+    missing = [name for name in modules if not _installed(name)]
+    if missing:
+        raise SuiteSkipped(f"missing modules: {', '.join(missing)}")
+
+
+@contextmanager
+def quiet():
+    """Silence the progress prints of the code under test"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        yield
+
+
+def import_from(directory: Path, module: str):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
+    return __import__(module)
+
+
+async def read_sse(response) -> list:
+    """Event names sent by a StreamingResponse of the SSE endpoints"""
+    events = []
+    async for chunk in response.body_iterator:
+        text = chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        for block in text.split("\n\n"):
+            if block.startswith("event: "):
+                events.append(block.split("\n", 1)[0][len("event: "):])
+    return events
+
+
+def check_stream(run, name: str, events: list):
+    ok = bool(events) and events[0] == "sources" and events[-1] == "done" and "error" not in events
+    run.check(name, ok, f"events: {events[0] if events else None} ... {events[-1] if events else None}, "
+                        f"{events.count('token')} tokens")
+
+
+def pdf_params(pdf: dict) -> dict:
+    return {"pages": pdf["pages"], "images_per_page": pdf["images_per_page"], "logo": pdf["logo"]}
+
+
+def bench_extract_images(run, corpus: dict, workdir: Path):
+    """extract_images_from_pdf on every synthetic PDF"""
+    require("fitz")
+    from corpus import expected_image_count
+    extract_images = import_from(SCRIPTS_DIR, "extract_images")
+
+    for pdf in corpus["pdfs"]:
+        output = workdir / "images" / pdf["name"]
+        images = run.measure(
+            f"extract_images/{pdf['name']}",
+            lambda: extract_images.extract_images_from_pdf(pdf["path"], str(output)),
+            params=pdf_params(pdf),
+            setup=lambda: shutil.rmtree(output, ignore_errors=True),
+            quiet=True
+        )
+        expected = expected_image_count(pdf)
+        run.check(f"extract_images/{pdf['name']}", len(images) == expected,
+                  f"{len(images)} images, expected {expected}")
+
+
+def bench_blank_detection(run, corpus: dict, workdir: Path):
+    """is_blank_image on figures, blank pages and logos"""
+    require("PIL", "numpy")
+    check_blank_image = import_from(SCRIPTS_DIR, "check_blank_image")
+
+    for image in corpus["images"]:
+        blank = run.measure(
+            f"blank_detection/{image['name']}",
+            lambda: check_blank_image.is_blank_image(image["path"]),
+            params={"width": image["width"], "height": image["height"], "pattern": image["pattern"]},
+            quiet=True
+        )
+        run.check(f"blank_detection/{image['name']}", blank == image["blank"],
+                  f"blank={blank}, expected {image['blank']}")
+
+
+def bench_doi(run, corpus: dict, workdir: Path):
+    """Text extraction, DOI search and metadata lookup against the CrossRef stub"""
+    require("PyPDF2", "requests")
+
+    with fakes.CrossRefStub() as crossref:
+        os.environ["CROSSREF_API_URL"] = crossref.url
+        extract_doi = import_from(SCRIPTS_DIR, "extract_doi")
+        extract_doi.CROSSREF_API_URL = crossref.url
+
+        for pdf in corpus["pdfs"]:
+            name = pdf["name"]
+            params = pdf_params(pdf)
+            text = run.measure(f"doi/text/{name}", lambda: extract_doi.extract_text_from_pdf(pdf["path"]),
+                               params=params, quiet=True)
+            run.measure(f"doi/find/{name}", lambda: extract_doi.find_doi_in_text(text), params=params)
+            doi = run.measure(
+                f"doi/extract/{name}",
+                lambda: extract_doi.find_doi_in_text(extract_doi.extract_text_from_pdf(pdf["path"])),
+                params=params, quiet=True
+            )
+            run.check(f"doi/extract/{name}", doi == pdf["doi"], f"found {doi}, expected {pdf['doi']}")
+
+            if pdf["doi"]:
+                metadata = run.measure(f"doi/crossref/{name}", lambda: extract_doi.fetch_doi_metadata(pdf["doi"]),
+                                       params=params, quiet=True)
+                run.check(f"doi/crossref/{name}", bool(metadata and metadata["title"]),
+                          "metadata parsed" if metadata else "no metadata")
+
+
+def bench_scripts_cli(run, corpus: dict, workdir: Path):
+    """The scripts as Node spawns them: interpreter start, imports and work"""
+    require("fitz", "PyPDF2", "requests")
+    pdf = next((p for p in corpus["pdfs"] if p["name"] == "article"), corpus["pdfs"][0])
+
+    with fakes.CrossRefStub() as crossref:
+        env = dict(os.environ, CROSSREF_API_URL=crossref.url)
+
+        def spawn(*args):
+            return subprocess.run([sys.executable, *args], cwd=ROOT / "backend", env=env,
+                                  capture_output=True, text=True)
+
+        result = run.measure(f"cli/extract_doi/{pdf['name']}",
+                             lambda: spawn(str(SCRIPTS_DIR / "extract_doi.py"), pdf["path"]),
+                             params=pdf_params(pdf))
+        run.check(f"cli/extract_doi/{pdf['name']}", result.returncode == 0, f"exit code {result.returncode}")
+
+        output = workdir / "cli_images"
+        result = run.measure(f"cli/extract_images/{pdf['name']}",
+                             lambda: spawn(str(SCRIPTS_DIR / "extract_images.py"), pdf["path"], str(output)),
+                             params=pdf_params(pdf),
+                             setup=lambda: shutil.rmtree(output, ignore_errors=True))
+        run.check(f"cli/extract_images/{pdf['name']}", result.returncode == 0, f"exit code {result.returncode}")
+
+
+def bench_rag_service(run, corpus: dict, workdir: Path):
+    """app.py: index build, index load, /query and /query/stream with fake embedding and LLM"""
+    require("fastapi", "llama_index.core", "pypdf")
+    with quiet():
+        app = import_from(SERVICE_DIR, "app")
+    from llama_index.core import Settings
+
+    # What ensure_rag_ready does, with the hashing model instead of HuggingFace
+    embed_model = fakes.llama_hash_embedding(app.EMBED_BATCH_SIZE)
+    if app.EMBED_WAIT_MS > 0:
+        embed_model = app.batched_embedding(embed_model, app.EMBED_BATCH_SIZE, app.EMBED_WAIT_MS)
+    Settings.embed_model = embed_model
+    Settings.llm = fakes.llama_fake_llm()
+    app.rag_state["ready"] = True
+    app.create_llm = lambda provider, model_name: fakes.llama_fake_llm()
+    # find_index_dir looks for "<name>_<paper_id>" folders, as in backend/MyPapers
+    app.PAPERS_DIR = workdir / "rag"
+
+    loop = asyncio.new_event_loop()
+    try:
+        for paper_id, pdf in enumerate(corpus["pdfs"], start=1):
+            bench_rag_paper(run, app, loop, paper_id, pdf)
+    finally:
+        loop.close()
+
+
+def bench_rag_paper(run, app, loop, paper_id: int, pdf: dict):
+    """Index, load and query one paper through app.py"""
+    name = pdf["name"]
+    params = pdf_params(pdf)
+    paper_dir = app.PAPERS_DIR / f"{name}_{paper_id}"
+    paper_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = paper_dir / Path(pdf["path"]).name
+    shutil.copyfile(pdf["path"], pdf_path)
+    index_dir = app.get_index_dir(paper_id, str(pdf_path))
+
+    chunks, pages = run.measure(
+        f"rag/index/{name}",
+        lambda: app.build_index(paper_id, str(pdf_path), index_dir, "ollama", "fake-llm"),
+        params=params,
+        setup=lambda: shutil.rmtree(index_dir, ignore_errors=True),
+        quiet=True
+    )
+    run.check(f"rag/index/{name}", chunks > 0 and pages == pdf["pages"], f"{chunks} chunks, {pages} pages")
+
+    run.measure(f"rag/load/{name}", lambda: app.load_index(index_dir), params=params, quiet=True)
+
+    # Through the FastAPI handlers, so a broken serving path fails a check
+    request = app.QueryRequest(paper_id=paper_id, question=QUESTION, provider="ollama", model_name="fake-llm")
+    answer = run.measure(f"rag/query/{name}", lambda: loop.run_until_complete(app.query_document(request)),
+                         params=params, quiet=True)
+    run.check(f"rag/query/{name}", bool(answer["response"].strip()) and bool(answer["sources"]),
+              f"{len(answer['response'])} characters, {len(answer['sources'])} sources")
+
+    # The budget must keep as many distinct chunks as the former top-5 retrieval
+    context = answer["context"]
+    context_chunks = import_from(SERVICE_DIR, "context_builder").CONTEXT_CHUNKS
+    expected = min(context_chunks, context["chunks_retrieved"] - context["chunks_duplicate"])
+    run.check(f"rag/context/{name}", context["chunks_used"] >= expected,
+              f"{context['chunks_used']} of {context['chunks_retrieved']} chunks used "
+              f"({context['chunks_duplicate']} duplicates, {context['chunks_over_budget']} over a "
+              f"{context['chunk_budget_tokens']}-token budget)")
+
+    async def stream():
+        return await read_sse(await app.query_document_stream(request, fakes.ConnectedClient()))
+
+    events = run.measure(f"rag/query_stream/{name}", lambda: loop.run_until_complete(stream()),
+                         params=params, quiet=True)
+    check_stream(run, f"rag/query_stream/{name}", events)
+
+
+def bench_paperqa_service(run, corpus: dict, workdir: Path):
+    """api.py: indexing, cold and cached queries, collection query (mocked LLMs)"""
+    require("fastapi", "paperqa", "numpy", "fitz")
+    service_dir = workdir / "paperqa"
+    service_dir.mkdir(parents=True, exist_ok=True)
+
+    # api.py creates ./indexes on import
+    previous_cwd = os.getcwd()
+    os.chdir(service_dir)
+    try:
+        with quiet():
+            api = import_from(SERVICE_DIR, "api")
+    finally:
+        os.chdir(previous_cwd)
+    api.index_dir = service_dir / "indexes"
+    api.index_dir.mkdir(exist_ok=True)
+    api.get_clients = lambda paperqa, provider, model: api.client_pool.get(
+        ("fake", provider, model), lambda: fakes.paperqa_fake_clients(paperqa, model)
+    )
+
+    # One loop for the whole suite: pooled clients keep loop-bound connections
+    loop = asyncio.new_event_loop()
+    try:
+        paper_ids = []
+        for paper_id, pdf in enumerate(corpus["pdfs"], start=1):
+            name = pdf["name"]
+            params = pdf_params(pdf)
+            paper_ids.append(paper_id)
+
+            indexed = run.measure(
+                f"paperqa/index/{name}",
+                lambda: loop.run_until_complete(api.index_paper(
+                    api.IndexRequest(paper_id=paper_id, pdf_path=pdf["path"])
+                )),
+                params=params,
+                quiet=True
+            )
+            run.check(f"paperqa/index/{name}", indexed["chunks"] > 0, f"{indexed['chunks']} chunks")
+
+            request = api.QueryRequest(question=QUESTION, paper_id=paper_id, pdf_path=pdf["path"])
+            run.measure(
+                f"paperqa/query_cold/{name}",
+                lambda: loop.run_until_complete(api.query_paper(request)),
+                params=params,
+                setup=lambda: api.docs_cache.pop(paper_id, None),
+                quiet=True
+            )
+            answer = run.measure(f"paperqa/query/{name}",
+                                 lambda: loop.run_until_complete(api.query_paper(request)),
+                                 params=params, quiet=True)
+            run.check(f"paperqa/query/{name}", bool(answer["response"]), f"{len(answer['citations'])} citations")
+
+            async def stream():
+                return await read_sse(await api.query_paper_stream(request, fakes.ConnectedClient()))
+
+            events = run.measure(f"paperqa/query_stream/{name}", lambda: loop.run_until_complete(stream()),
+                                 params=params, quiet=True)
+            check_stream(run, f"paperqa/query_stream/{name}", events)
+
+        request = api.CollectionQueryRequest(question=QUESTION, paper_ids=paper_ids)
+        answer = run.measure("paperqa/collection_query",
+                             lambda: loop.run_until_complete(api.query_collection(request)),
+                             params={"papers": len(paper_ids)}, quiet=True)
+        run.check("paperqa/collection_query", bool(answer["response"]), f"{len(answer['citations'])} citations")
+    finally:
+        loop.close()
+
+
+SUITES = {
+    "extract_images": bench_extract_images,
+    "blank_detection": bench_blank_detection,
+    "doi": bench_doi,
+    "cli": bench_scripts_cli,
+    "rag": bench_rag_service,
+    "paperqa": bench_paperqa_service,
+}
@@ -1,10 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from paperqa import Settings, Docs
 import os
 from pathlib import Path
 import json
+import asyncio
+import pickle
+import time
+import sqlite3
+import threading
+from typing import List, Optional
+
+from startup import timed_import, timed_step, startup_report, print_startup_report
+from llm_pool import ClientPool, secret_fingerprint
+from metrics import Metrics
+from streaming import sse_event, SSE_HEADERS
+from workers import BlockingPool
 
 app = FastAPI(title="PaperQA Service for FormPaper3001")
 
@@ -22,8 +34,32 @@ def load_groq_api_key():
     print("[PaperQA] No Groq API key found in settings.json")
     return False
 
-# Charger la clé au démarrage
-load_groq_api_key()
+# PaperQA (et litellm) sont importés au premier usage ou par le préchauffage,
+# pour que uvicorn accepte les connexions immédiatement
+paperqa_state = {
+    "ready": False,
+    "error": None,
+    "warmup_task": None
+}
+paperqa_lock = threading.Lock()
+
+def ensure_paperqa_ready():
+    """Importe PaperQA et charge la clé Groq une seule fois (bloquant)"""
+    if paperqa_state["ready"]:
+        return timed_import("paperqa")
+    with paperqa_lock:
+        if not paperqa_state["ready"]:
+            try:
+                with timed_step("read settings.json"):
+                    load_groq_api_key()
+                timed_import("paperqa")
+                paperqa_state["ready"] = True
+                paperqa_state["error"] = None
+                print_startup_report("[PaperQA]")
+            except Exception as e:
+                paperqa_state["error"] = str(e)
+                raise
+    return timed_import("paperqa")
 
 # CORS pour communiquer avec le backend Node.js
 app.add_middleware(
@@ -39,16 +75,107 @@ class QueryRequest(BaseModel):
     pdf_path: str
     llm_model: str = "llama-3.3-70b-versatile"
     
+class CollectionQueryRequest(BaseModel):
+    question: str
+    paper_ids: Optional[List[int]] = None
+    collection_id: Optional[int] = None
+    llm_model: str = "llama-3.3-70b-versatile"
+    top_k: int = 20
+
 class IndexRequest(BaseModel):
     paper_id: int
     pdf_path: str
     ollama_model: str = "llama3.1:8b"
 
+@app.on_event("startup")
+async def start_warmup():
+    """Préchauffage optionnel en arrière-plan (PAPERQA_WARMUP=0 pour désactiver)"""
+    if os.getenv("PAPERQA_WARMUP", "1") != "0":
+        async def warmup():
+            try:
+                await blocking_pool.run("warmup", ensure_paperqa_ready)
+            except Exception as e:
+                print(f"[PaperQA] Warm-up failed: {str(e)}")
+        # Référence conservée pour que la tâche ne soit pas collectée en cours de route
+        paperqa_state["warmup_task"] = asyncio.create_task(warmup())
+
 # Cache des documents indexés
 docs_cache = {}
 index_dir = Path("./indexes")
 index_dir.mkdir(exist_ok=True)
 
+# Limites de concurrence : les indexations Ollama passent une par une,
+# les lectures/écritures de fichiers sortent de la boucle d'événements
+blocking_pool = BlockingPool({
+    "index": int(os.getenv("PAPERQA_INDEX_WORKERS", "1")),
+    "query": int(os.getenv("PAPERQA_QUERY_WORKERS", "4")),
+    "io": int(os.getenv("PAPERQA_IO_WORKERS", "4")),
+    "retrieve": int(os.getenv("PAPERQA_RETRIEVE_WORKERS", "4"))
+})
+
+# Durées par étape, tokens et succès de cache, exposés sur /metrics
+metrics = Metrics("paperqa")
+TIMING_HEADERS = os.getenv("PAPERQA_TIMING_HEADERS", "0") == "1"
+
+# Un jeu de clients par (fournisseur, modèle, URL, clé), partagé entre les requêtes
+client_pool = ClientPool(
+    max_size=int(os.getenv("PAPERQA_CLIENT_POOL_SIZE", "16")),
+    on_lookup=lambda hit: metrics.cache("llm_clients", "hit" if hit else "miss")
+)
+
+@app.middleware("http")
+async def track_request(request: Request, call_next):
+    """Latence par route et en-tête Server-Timing optionnel (ou X-Timing: 1)"""
+    return await metrics.track_request(request, call_next, TIMING_HEADERS)
+
+def read_index_metadata(paper_id: int):
+    """Lit les métadonnées d'index d'un paper (None si absent)"""
+    index_file = index_dir / f"paper_{paper_id}.json"
+    if not index_file.exists():
+        return None
+    with open(index_file, 'r') as f:
+        return json.load(f)
+
+def write_index_metadata(paper_id: int, metadata: dict):
+    """Écrit les métadonnées d'index d'un paper"""
+    index_file = index_dir / f"paper_{paper_id}.json"
+    print(f"[PaperQA] Saving index to {index_file}")
+    with open(index_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+def save_docs(paper_id: int, docs):
+    """Sauvegarde le Docs PaperQA (textes + embeddings) sur disque"""
+    docs_file = index_dir / f"paper_{paper_id}.pkl"
+    with open(docs_file, 'wb') as f:
+        pickle.dump(docs, f)
+
+def load_docs(paper_id: int):
+    """Recharge un Docs sauvegardé (None si absent ou illisible)"""
+    docs_file = index_dir / f"paper_{paper_id}.pkl"
+    if not docs_file.exists():
+        return None
+    try:
+        with open(docs_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"[PaperQA] Could not load {docs_file}: {str(e)}")
+        return None
+
+def read_collection_paper_ids(collection_id: int) -> List[int]:
+    """Liste les papers d'une collection depuis la base SQLite du backend"""
+    db_path = Path("../backend/formpaper.db")
+    if not db_path.exists():
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT paper_id FROM paper_collections WHERE collection_id = ? ORDER BY paper_id",
+            (collection_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
 @app.get("/")
 async def root():
     return {
@@ -59,7 +186,34 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "paperqa"}
+    return {
+        "status": "healthy",
+        "service": "paperqa",
+        "workers": blocking_pool.stats(),
+        "client_pool": client_pool.stats()
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métriques au format texte Prometheus (durées par étape, tokens, caches)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+async def readiness_check():
+    """Prêt une fois PaperQA importé et la clé Groq chargée (503 sinon)"""
+    body = {
+        "ready": paperqa_state["ready"],
+        "error": paperqa_state["error"],
+        "startup": startup_report()
+    }
+    if not paperqa_state["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/startup")
+async def startup_timings():
+    """Détail du coût des imports différés et du préchauffage"""
+    return startup_report()
 
 @app.post("/api/paperqa/index")
 async def index_paper(request: IndexRequest):
@@ -75,43 +229,42 @@ async def index_paper(request: IndexRequest):
         print(f"[PaperQA] PDF path: {pdf_path}")
         
         # Vérifier que le PDF existe
-        if not os.path.exists(pdf_path):
+        if not await blocking_pool.run("io", os.path.exists, pdf_path):
             raise HTTPException(status_code=404, detail=f"PDF not found: {pdf_path}")
         
+        paperqa = await blocking_pool.run("warmup", ensure_paperqa_ready)
+
         # Configuration pour l'indexation avec Ollama
-        indexing_settings = Settings(
-            llm=f"ollama/{request.ollama_model}",
-            summary_llm=f"ollama/{request.ollama_model}",
-            embedding="ollama/nomic-embed-text",
-            temperature=0.1,
-        )
+        indexing = get_clients(paperqa, "ollama", request.ollama_model)
         
         print(f"[PaperQA] Using Ollama model: {request.ollama_model}")
 
         # Créer l'objet Docs
-        docs = Docs()
+        docs = paperqa.Docs()
 
         # Ajouter le PDF
         print(f"[PaperQA] Adding PDF to index...")
-        await docs.aadd(pdf_path, settings=indexing_settings)
+        async with blocking_pool.limit("index"):
+            with metrics.stage("index_build"):
+                await docs.aadd(
+                    pdf_path,
+                    settings=indexing["settings"],
+                    llm_model=indexing["llm_model"],
+                    embedding_model=indexing["embedding_model"]
+                )
 
         # Sauvegarder dans le cache
         docs_cache[paper_id] = docs
 
-        # Sauvegarder l'index sur disque
-        index_file = index_dir / f"paper_{paper_id}.json"
-        print(f"[PaperQA] Saving index to {index_file}")
-        
-        # On sauvegarde juste les métadonnées pour info
+        # Sauvegarder l'index sur disque (Docs complet + métadonnées)
+        await blocking_pool.run("io", save_docs, paper_id, docs)
         metadata = {
             "paper_id": paper_id,
             "pdf_path": pdf_path,
             "num_docs": len(docs.docs),
             "indexed": True
         }
-        
-        with open(index_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        await blocking_pool.run("io", write_index_metadata, paper_id, metadata)
         
         print(f"[PaperQA] Indexation completed: {len(docs.docs)} chunks")
 
@@ -126,6 +279,133 @@ async def index_paper(request: IndexRequest):
         print(f"[PaperQA] Error indexing paper {request.paper_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Indexation error: {str(e)}")
 
+async def get_docs(paper_id: int, paperqa):
+    """Récupère le Docs d'un paper depuis le cache, ou le réindexe depuis le disque"""
+    if paper_id in docs_cache:
+        metrics.cache("docs", "hit")
+        return docs_cache[paper_id]
+
+    # Vérifier si un index existe sur disque
+    metadata = await blocking_pool.run("io", read_index_metadata, paper_id)
+    if not metadata:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Paper {paper_id} not indexed. Please index it first."
+        )
+
+    # Recharger le Docs sauvegardé, sans réindexer
+    with metrics.stage("index_load"):
+        docs = await blocking_pool.run("io", load_docs, paper_id)
+    if docs is not None:
+        metrics.cache("docs", "disk")
+        docs_cache[paper_id] = docs
+        return docs
+    metrics.cache("docs", "miss")
+
+    # Index sauvegardé avant la persistance du Docs : réindexer
+    print(f"[PaperQA] Index exists but not in cache, re-indexing...")
+    pdf_path = metadata['pdf_path']
+    
+    # Réindexer avec Ollama
+    indexing = get_clients(paperqa, "ollama", "llama3.1:8b")
+    docs = paperqa.Docs()
+    async with blocking_pool.limit("index"):
+        with metrics.stage("index_build"):
+            await docs.aadd(
+                pdf_path,
+                settings=indexing["settings"],
+                llm_model=indexing["llm_model"],
+                embedding_model=indexing["embedding_model"]
+            )
+    docs_cache[paper_id] = docs
+    await blocking_pool.run("io", save_docs, paper_id, docs)
+    return docs
+
+class TimedEmbeddingModel:
+    """
+    Modèle d'embedding PaperQA dont chaque appel est mesuré (étape `embedding`),
+    à l'indexation comme à la récupération des passages
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __getattr__(self, name):
+        if name == "_model":
+            raise AttributeError(name)
+        return getattr(self._model, name)
+
+    async def embed_documents(self, texts):
+        with metrics.stage("embedding"):
+            return await self._model.embed_documents(texts)
+
+def get_clients(paperqa, provider: str, model: str) -> dict:
+    """
+    Settings PaperQA et modèles LLM / résumé / embedding d'un fournisseur,
+    construits une fois puis réutilisés (connexions HTTP gardées ouvertes)
+    """
+    key = (
+        provider,
+        model,
+        os.environ.get("OLLAMA_API_BASE"),
+        secret_fingerprint(os.environ.get("GROQ_API_KEY")) if provider == "groq" else None
+    )
+
+    def build():
+        settings = paperqa.Settings(
+            llm=f"{provider}/{model}",
+            summary_llm=f"{provider}/{model}",
+            embedding="ollama/nomic-embed-text",
+            temperature=0.1,
+        )
+        return {
+            "settings": settings,
+            "llm_model": settings.get_llm(),
+            "summary_llm_model": settings.get_summary_llm(),
+            "embedding_model": TimedEmbeddingModel(settings.get_embedding_model())
+        }
+
+    return client_pool.get(key, build)
+
+def query_clients(paperqa, llm_model: str) -> dict:
+    """Clients pour les requêtes avec Groq"""
+    print(f"[PaperQA] Using Groq model: {llm_model}")
+    return get_clients(paperqa, "groq", llm_model)
+
+def record_token_counts(session):
+    """Reporte les tokens consommés par une session PaperQA dans les métriques"""
+    for prompt_tokens, completion_tokens in (getattr(session, "token_counts", None) or {}).values():
+        metrics.tokens("prompt", prompt_tokens)
+        metrics.tokens("completion", completion_tokens)
+
+def format_citations(session, paper_by_dockey: Optional[dict] = None) -> list:
+    """Extraire les citations d'une réponse PaperQA (avec le paper_id si connu)"""
+    citations = []
+    if hasattr(session, 'contexts') and session.contexts:
+        for ctx in session.contexts:
+            citation = {
+                "text": ctx.text.context if hasattr(ctx.text, 'context') else str(ctx.text)[:200],
+                "score": float(ctx.score) if hasattr(ctx, 'score') else 0.0,
+                "key": ctx.key if hasattr(ctx, 'key') else ""
+            }
+            if paper_by_dockey is not None:
+                citation["paper_id"] = paper_by_dockey.get(ctx.text.doc.dockey)
+            citations.append(citation)
+    return citations
+
+def score_texts(texts: list, query_embedding: list) -> list:
+    """Similarité cosinus entre la question et chaque passage (bloquant)"""
+    import numpy as np
+
+    candidates = [text for text in texts if text.embedding is not None]
+    if not candidates:
+        return []
+    matrix = np.asarray([text.embedding for text in candidates], dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+    return list(zip(scores.tolist(), candidates))
+
 @app.post("/api/paperqa/query")
 async def query_paper(request: QueryRequest):
     """
@@ -138,57 +418,36 @@ async def query_paper(request: QueryRequest):
         
         print(f"[PaperQA] Query for paper {paper_id}: {question}")
 
+        paperqa = await blocking_pool.run("warmup", ensure_paperqa_ready)
+
         # Récupérer ou créer l'index
-        if paper_id not in docs_cache:
-            # Vérifier si un index existe sur disque
-            index_file = index_dir / f"paper_{paper_id}.json"
-            if index_file.exists():
-                # Réindexer (on ne peut pas vraiment charger l'index PaperQA du disque facilement)
-                print(f"[PaperQA] Index exists but not in cache, re-indexing...")
-                with open(index_file, 'r') as f:
-                    metadata = json.load(f)
-                    pdf_path = metadata['pdf_path']
-                
-                # Réindexer avec Ollama
-                indexing_settings = Settings(
-                    llm="ollama/llama3.1:8b",
-                    summary_llm="ollama/llama3.1:8b",
-                    embedding="ollama/nomic-embed-text",
-                )
-                docs = Docs()
-                await docs.aadd(pdf_path, settings=indexing_settings)
-                docs_cache[paper_id] = docs
-            else:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Paper {paper_id} not indexed. Please index it first."
-                )
-        else:
-            docs = docs_cache[paper_id]
-        
-        # Configuration pour les requêtes avec Groq
-        query_settings = Settings(
-            llm=f"groq/{request.llm_model}",
-            summary_llm=f"groq/{request.llm_model}",
-            embedding="ollama/nomic-embed-text",
-            temperature=0.1,
-        )
+        docs = await get_docs(paper_id, paperqa)
         
-        print(f"[PaperQA] Using Groq model: {request.llm_model}")
+        clients = query_clients(paperqa, request.llm_model)
 
         # Poser la question
         print(f"[PaperQA] Querying document...")
-        answer = await docs.aquery(question, settings=query_settings)
+        async with blocking_pool.limit("query"):
+            # Passages pertinents et leurs résumés (embedding, recherche, LLM de résumé)
+            with metrics.stage("evidence"):
+                session = await docs.aget_evidence(
+                    question,
+                    settings=clients["settings"],
+                    summary_llm_model=clients["summary_llm_model"],
+                    embedding_model=clients["embedding_model"]
+                )
+            # Génération de la réponse à partir de ces passages
+            with metrics.stage("llm"):
+                answer = await docs.aquery(
+                    session,
+                    settings=clients["settings"],
+                    llm_model=clients["llm_model"],
+                    summary_llm_model=clients["summary_llm_model"],
+                    embedding_model=clients["embedding_model"]
+                )
+        record_token_counts(answer)
         
-        # Extraire les citations
-        citations = []
-        if hasattr(answer, 'contexts') and answer.contexts:
-            for ctx in answer.contexts:
-                citations.append({
-                    "text": ctx.text.context if hasattr(ctx.text, 'context') else str(ctx.text)[:200],
-                    "score": float(ctx.score) if hasattr(ctx, 'score') else 0.0,
-                    "key": ctx.key if hasattr(ctx, 'key') else ""
-                })
+        citations = format_citations(answer)
         
         print(f"[PaperQA] Query successful with {len(citations)} citations")
 
@@ -203,14 +462,196 @@ async def query_paper(request: QueryRequest):
         print(f"[PaperQA] Error querying paper {request.paper_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Query error: {str(e)}")
 
+@app.post("/api/paperqa/query/stream")
+async def query_paper_stream(request: QueryRequest, http_request: Request):
+    """
+    Interroge un article avec PaperQA en Server-Sent Events :
+    les citations (`sources`) d'abord, puis un événement `token` par morceau
+    de réponse, puis `done`. Si le client se déconnecte, l'appel LLM est annulé.
+    """
+    paper_id = request.paper_id
+    question = request.question
+
+    print(f"[PaperQA] Streaming query for paper {paper_id}: {question}")
+
+    paperqa = await blocking_pool.run("warmup", ensure_paperqa_ready)
+    docs = await get_docs(paper_id, paperqa)
+    clients = query_clients(paperqa, request.llm_model)
+
+    async def event_stream():
+        tokens = asyncio.Queue()
+        task = None
+        async with blocking_pool.limit("query"):
+            try:
+                # Récupérer les passages avant de générer la réponse
+                with metrics.stage("evidence"):
+                    session = await docs.aget_evidence(
+                        question,
+                        settings=clients["settings"],
+                        summary_llm_model=clients["summary_llm_model"],
+                        embedding_model=clients["embedding_model"]
+                    )
+                yield sse_event("sources", {"paper_id": paper_id, "sources": format_citations(session)})
+
+                # Les callbacks PaperQA reçoivent chaque morceau de la réponse
+                task = asyncio.create_task(docs.aquery(
+                    session,
+                    settings=clients["settings"],
+                    callbacks=[tokens.put_nowait],
+                    llm_model=clients["llm_model"],
+                    summary_llm_model=clients["summary_llm_model"],
+                    embedding_model=clients["embedding_model"]
+                ))
+                task.add_done_callback(lambda _: tokens.put_nowait(None))
+
+                llm_start = time.perf_counter()
+                first_token = True
+                while True:
+                    token = await tokens.get()
+                    if token is None:
+                        break
+                    if first_token:
+                        metrics.observe_stage("llm_first_token", time.perf_counter() - llm_start)
+                        first_token = False
+                    if await http_request.is_disconnected():
+                        print(f"[PaperQA] Client disconnected, cancelling query for paper {paper_id}")
+                        return
+                    yield sse_event("token", {"token": token})
+
+                answer = task.result()
+                metrics.observe_stage("llm", time.perf_counter() - llm_start)
+                record_token_counts(answer)
+                yield sse_event("done", {
+                    "paper_id": paper_id,
+                    "formatted_answer": str(answer.formatted_answer) if hasattr(answer, 'formatted_answer') else str(answer.answer)
+                })
+
+            except Exception as e:
+                print(f"[PaperQA] Error streaming query for paper {paper_id}: {str(e)}")
+                yield sse_event("error", {"detail": f"Query error: {str(e)}"})
+            finally:
+                if task is not None and not task.done():
+                    task.cancel()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/api/paperqa/collection/query")
+async def query_collection(request: CollectionQueryRequest):
+    """
+    Interroge plusieurs papers (liste d'IDs ou collection) en une seule passe :
+    les passages de chaque index sont scorés en parallèle, fusionnés par score,
+    puis une seule génération de réponse cite chaque paper. Les papers non
+    indexés sont ignorés et listés dans `skipped_paper_ids`.
+    """
+    try:
+        paper_ids = list(request.paper_ids or [])
+        if request.collection_id is not None:
+            paper_ids += await blocking_pool.run("io", read_collection_paper_ids, request.collection_id)
+        paper_ids = list(dict.fromkeys(paper_ids))
+        if not paper_ids:
+            raise HTTPException(status_code=400, detail="No papers to query")
+
+        print(f"[PaperQA] Collection query over {len(paper_ids)} papers: {request.question}")
+
+        paperqa = await blocking_pool.run("warmup", ensure_paperqa_ready)
+        clients = query_clients(paperqa, request.llm_model)
+
+        async def get_indexed_docs(pid: int):
+            try:
+                return await get_docs(pid, paperqa)
+            except HTTPException as e:
+                if e.status_code == 404:
+                    return None
+                raise
+
+        # Charger les index de tous les papers en parallèle, sans les papers non indexés
+        loaded = await asyncio.gather(*(get_indexed_docs(pid) for pid in paper_ids))
+        skipped_paper_ids = [pid for pid, docs in zip(paper_ids, loaded) if docs is None]
+        paper_ids = [pid for pid, docs in zip(paper_ids, loaded) if docs is not None]
+        all_docs = [docs for docs in loaded if docs is not None]
+        if not all_docs:
+            raise HTTPException(status_code=404, detail="None of the papers is indexed. Please index them first.")
+        if skipped_paper_ids:
+            print(f"[PaperQA] Skipping papers not indexed: {skipped_paper_ids}")
+        paper_by_dockey = {
+            dockey: pid
+            for pid, docs in zip(paper_ids, all_docs)
+            for dockey in docs.docs
+        }
+
+        # Embedding de la question pour le scoring concurrent par paper ;
+        # aquery la réembarque ensuite pour sa récupération sur les top_k retenus
+        query_embedding = (await clients["embedding_model"].embed_documents([request.question]))[0]
+        with metrics.stage("retrieval"):
+            scored = await asyncio.gather(*(
+                blocking_pool.run("retrieve", score_texts, docs.texts, query_embedding)
+                for docs in all_docs
+            ))
+        candidates = sorted(
+            (item for paper_scores in scored for item in paper_scores),
+            key=lambda item: item[0],
+            reverse=True
+        )[:request.top_k]
+
+        # Docs combiné : les embeddings existants sont réutilisés tels quels.
+        # aadd_texts renomme doc et textes en cas de docname en double : on lui
+        # passe des copies pour ne pas modifier les Docs du cache
+        combined = paperqa.Docs()
+        texts_by_doc = {}
+        for _, text in candidates:
+            texts_by_doc.setdefault(text.doc.dockey, (text.doc, []))[1].append(text)
+        for doc, texts in texts_by_doc.values():
+            doc_copy = doc.model_copy()
+            await combined.aadd_texts(
+                [text.model_copy(update={"doc": doc_copy}) for text in texts],
+                doc_copy,
+                settings=clients["settings"],
+                embedding_model=clients["embedding_model"]
+            )
+
+        async with blocking_pool.limit("query"):
+            with metrics.stage("evidence"):
+                session = await combined.aget_evidence(
+                    request.question,
+                    settings=clients["settings"],
+                    summary_llm_model=clients["summary_llm_model"],
+                    embedding_model=clients["embedding_model"]
+                )
+            with metrics.stage("llm"):
+                answer = await combined.aquery(
+                    session,
+                    settings=clients["settings"],
+                    llm_model=clients["llm_model"],
+                    summary_llm_model=clients["summary_llm_model"],
+                    embedding_model=clients["embedding_model"]
+                )
+        record_token_counts(answer)
+
+        citations = format_citations(answer, paper_by_dockey)
+
+        print(f"[PaperQA] Collection query successful with {len(citations)} citations")
+
+        return {
+            "success": True,
+            "paper_ids": paper_ids,
+            "skipped_paper_ids": skipped_paper_ids,
+            "response": str(answer.answer),
+            "citations": citations,
+            "formatted_answer": str(answer.formatted_answer) if hasattr(answer, 'formatted_answer') else str(answer.answer),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[PaperQA] Error querying collection: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Collection query error: {str(e)}")
+
 @app.get("/api/paperqa/status/{paper_id}")
 async def check_status(paper_id: int):
     """Vérifie si un paper est indexé"""
-    index_file = index_dir / f"paper_{paper_id}.json"
+    metadata = await blocking_pool.run("io", read_index_metadata, paper_id)
     
-    if index_file.exists():
-        with open(index_file, 'r') as f:
-            metadata = json.load(f)
+    if metadata:
         return {
             "success": True,
             "indexed": True,
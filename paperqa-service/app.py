@@ -1,18 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import os
 import json
 import time
+import asyncio
+import threading
+from contextlib import aclosing
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import uvicorn
 
-# Import LlamaIndex
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings, StorageContext, load_index_from_storage
-from llama_index.llms.groq import Groq
-from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from startup import timed_import, timed_step, startup_report, print_startup_report
+from bulk_index import BulkIndexJob, discover_papers, file_sha256
+from context_builder import ContextBuilder, count_tokens, default_budget
+from embed_batcher import batched_embedding
+from index_store import INDEX_FILE, compact_index_path, read_header, read_index, update_header, write_index
+from llm_pool import ClientPool, secret_fingerprint
+from metrics import Metrics
+from streaming import sse_event, SSE_HEADERS
+from workers import BlockingPool
 
 app = FastAPI(title="LlamaIndex RAG Service for FormPaper")
 
@@ -31,9 +39,113 @@ config = {
     "ollama_base_url": "http://localhost:11434"
 }
 
-# Initialize embedding model (local, free)
-embed_model = HuggingFaceEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
-Settings.embed_model = embed_model
+# Blocking work (PDF loading, embedding, index I/O, LLM calls) runs here so the
+# event loop keeps answering /health and /status during long index runs
+blocking_pool = BlockingPool({
+    "index": int(os.getenv("RAG_INDEX_WORKERS", "1")),
+    "query": int(os.getenv("RAG_QUERY_WORKERS", "4")),
+    "io": int(os.getenv("RAG_IO_WORKERS", "4")),
+    "bulk": int(os.getenv("RAG_BULK_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+})
+
+# Stage histograms, token counts and cache lookups, served on /metrics
+metrics = Metrics("rag")
+TIMING_HEADERS = os.getenv("RAG_TIMING_HEADERS", "0") == "1"
+
+# One LLM client per (provider, model, base_url, key), shared by all requests
+llm_pool = ClientPool(
+    max_size=int(os.getenv("RAG_LLM_POOL_SIZE", "16")),
+    on_lookup=lambda hit: metrics.cache("llm_clients", "hit" if hit else "miss")
+)
+
+PAPERS_DIR = Path(__file__).parent.parent / "backend" / "MyPapers"
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "32"))
+# Concurrent embedding calls are merged by a dispatcher (RAG_EMBED_WAIT_MS=0 disables)
+EMBED_WAIT_MS = float(os.getenv("RAG_EMBED_WAIT_MS", "5"))
+
+# History plus retrieved chunks are fitted into one token budget per query
+RETRIEVAL_TOP_K = int(os.getenv("RAG_RETRIEVAL_TOP_K", "8"))
+# The default budget fits as many full chunks as the former top-5 retrieval
+HISTORY_BUDGET = int(os.getenv("RAG_HISTORY_BUDGET", "800"))
+context_builder = ContextBuilder(
+    budget_tokens=int(os.getenv("RAG_CONTEXT_BUDGET", str(default_budget(HISTORY_BUDGET)))),
+    history_budget_tokens=HISTORY_BUDGET,
+    on_summary_lookup=lambda hit: metrics.cache("history_summaries", "hit" if hit else "miss")
+)
+
+# LlamaIndex, torch and the embedding weights are loaded on first use (or by
+# the background warm-up) so uvicorn accepts connections right away
+rag_state = {
+    "ready": False,
+    "error": None,
+    "warmup_task": None
+}
+rag_lock = threading.Lock()
+
+def ensure_rag_ready():
+    """Import LlamaIndex and load the embedding model once (blocking)"""
+    if rag_state["ready"]:
+        return
+    with rag_lock:
+        if rag_state["ready"]:
+            return
+        try:
+            core = timed_import("llama_index.core")
+            timed_import("llama_index.llms.groq")
+            timed_import("llama_index.llms.ollama")
+            huggingface = timed_import("llama_index.embeddings.huggingface")
+
+            # Initialize embedding model (local, free)
+            with timed_step(f"load embedding model {EMBED_MODEL_NAME}"):
+                embed_model = huggingface.HuggingFaceEmbedding(
+                    model_name=EMBED_MODEL_NAME,
+                    embed_batch_size=EMBED_BATCH_SIZE
+                )
+            if EMBED_WAIT_MS > 0:
+                embed_model = batched_embedding(embed_model, EMBED_BATCH_SIZE, EMBED_WAIT_MS)
+            core.Settings.embed_model = embed_model
+
+            rag_state["ready"] = True
+            rag_state["error"] = None
+            print_startup_report("[RAG]")
+        except Exception as e:
+            rag_state["error"] = str(e)
+            raise
+
+def embedding_batch_stats() -> Optional[dict]:
+    """Batching counters of the shared embedding model, once it is loaded"""
+    if not rag_state["ready"]:
+        return None
+    from llama_index.core import Settings
+    batch_stats = getattr(Settings.embed_model, "batch_stats", None)
+    return batch_stats() if batch_stats else None
+
+def embedding_batch_samples() -> list:
+    """Embedding batcher counters for /metrics"""
+    samples = []
+    for kind, stats in (embedding_batch_stats() or {}).items():
+        for counter in ("requests", "texts", "batches"):
+            samples.append((f"formpaper_embedding_batch_{counter}_total", {"kind": kind}, stats[counter]))
+    return samples
+
+metrics.add_collector(embedding_batch_samples)
+
+@app.middleware("http")
+async def track_request(request: Request, call_next):
+    """Request latency histogram and optional Server-Timing header (or X-Timing: 1)"""
+    return await metrics.track_request(request, call_next, TIMING_HEADERS)
+
+@app.on_event("startup")
+async def start_warmup():
+    """Optionally warm up models in the background (RAG_WARMUP=0 to disable)"""
+    if os.getenv("RAG_WARMUP", "1") != "0":
+        async def warmup():
+            try:
+                await blocking_pool.run("warmup", ensure_rag_ready)
+            except Exception as e:
+                print(f"[RAG ERROR] Warm-up failed: {str(e)}")
+        # Keep a reference so the task is not garbage-collected mid-run
+        rag_state["warmup_task"] = asyncio.create_task(warmup())
 
 class ConfigRequest(BaseModel):
     groq_api_key: Optional[str] = None
@@ -51,6 +163,7 @@ class QueryRequest(BaseModel):
     history: Optional[List[dict]] = []
     provider: str = "groq"
     model_name: str = "llama-3.3-70b-versatile"
+    context_budget: Optional[int] = None
 
 @app.post("/config")
 async def set_config(req: ConfigRequest):
@@ -69,8 +182,23 @@ def get_index_dir(paper_id: int, pdf_path: str) -> Path:
     index_dir = pdf_dir / f"{paper_id}_llamaindex"
     return index_dir
 
+def llm_key(provider: str, model_name: str) -> tuple:
+    """Pool key: everything that makes two LLM clients different"""
+    if provider == "groq":
+        return ("groq", model_name, None, secret_fingerprint(config["groq_api_key"]))
+    return ("ollama", model_name, config["ollama_base_url"], None)
+
+def get_llm(provider: str, model_name: str):
+    """Pooled LLM client, reused across requests (keeps its HTTP connections alive)"""
+    if provider == "groq" and not config["groq_api_key"]:
+        raise ValueError("Groq API key not configured")
+    return llm_pool.get(llm_key(provider, model_name), lambda: create_llm(provider, model_name))
+
 def create_llm(provider: str, model_name: str):
     """Create LLM instance based on provider"""
+    from llama_index.llms.groq import Groq
+    from llama_index.llms.ollama import Ollama
+
     if provider == "groq":
         if not config["groq_api_key"]:
             raise ValueError("Groq API key not configured")
@@ -86,6 +214,172 @@ def create_llm(provider: str, model_name: str):
             temperature=0.1
         )
 
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+LEGACY_INDEX_FILES = [
+    "docstore.json", "default__vector_store.json", "index_store.json",
+    "graph_store.json", "image__vector_store.json", "metadata.json"
+]
+
+def node_record(node) -> dict:
+    """Everything but text and embedding needed to rebuild a chunk node"""
+    return {
+        "id": node.node_id,
+        "ref_doc_id": node.ref_doc_id,
+        "metadata": node.metadata,
+        "excluded_embed_metadata_keys": node.excluded_embed_metadata_keys,
+        "excluded_llm_metadata_keys": node.excluded_llm_metadata_keys,
+        "start_char_idx": node.start_char_idx,
+        "end_char_idx": node.end_char_idx
+    }
+
+def node_from_record(text: str, record: dict, embedding: List[float]):
+    from llama_index.core.schema import TextNode, NodeRelationship, RelatedNodeInfo
+
+    relationships = {}
+    if record.get("ref_doc_id"):
+        relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=record["ref_doc_id"])
+    return TextNode(
+        id_=record["id"],
+        text=text,
+        metadata=record.get("metadata") or {},
+        excluded_embed_metadata_keys=record.get("excluded_embed_metadata_keys") or [],
+        excluded_llm_metadata_keys=record.get("excluded_llm_metadata_keys") or [],
+        start_char_idx=record.get("start_char_idx"),
+        end_char_idx=record.get("end_char_idx"),
+        relationships=relationships,
+        embedding=embedding
+    )
+
+def save_compact_index(index_dir: Path, nodes: list, header: dict):
+    """Persist embedded nodes in the compact format and drop legacy JSON stores"""
+    write_index(
+        index_dir / INDEX_FILE,
+        dict(header, embedding_model=EMBED_MODEL_NAME),
+        [node.get_content() for node in nodes],
+        [node_record(node) for node in nodes],
+        [node.embedding for node in nodes]
+    )
+    for name in LEGACY_INDEX_FILES:
+        legacy_path = index_dir / name
+        if legacy_path.exists():
+            legacy_path.unlink()
+
+def read_index_info(index_dir: Path) -> Optional[dict]:
+    """Header of a paper's index (legacy indexes: metadata.json), None if not indexed"""
+    compact_path = compact_index_path(index_dir)
+    if compact_path:
+        header = read_header(compact_path)
+        return dict(header, chunks=header["chunk_count"], format="compact")
+
+    docstore_path = index_dir / "docstore.json"
+    if not docstore_path.exists():
+        return None
+    try:
+        metadata = {}
+        metadata_path = index_dir / "metadata.json"
+        if metadata_path.exists():
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        if "chunks" not in metadata:
+            # Count chunks from docstore
+            with open(docstore_path, 'r', encoding='utf-8') as f:
+                docstore = json.load(f)
+            metadata["chunks"] = len(docstore.get("docstore/data", {}))
+    except FileNotFoundError:
+        # Converted to the compact format while we were reading it
+        if compact_index_path(index_dir):
+            return read_index_info(index_dir)
+        raise
+    return dict(metadata, format="legacy")
+
+# Converting a legacy index deletes its JSON stores: one lock per index
+# directory keeps concurrent first queries from reading them mid-conversion
+legacy_locks = {}
+legacy_locks_guard = threading.Lock()
+
+def legacy_lock(index_dir: Path) -> threading.Lock:
+    with legacy_locks_guard:
+        return legacy_locks.setdefault(str(index_dir.resolve()), threading.Lock())
+
+def load_index(index_dir: Path):
+    """Load a paper's index, converting a legacy JSON index to the compact format"""
+    from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
+
+    compact_path = compact_index_path(index_dir)
+    if not compact_path:
+        with legacy_lock(index_dir):
+            # Another query may have converted it while we waited
+            compact_path = compact_index_path(index_dir)
+            if not compact_path:
+                storage_context = StorageContext.from_defaults(persist_dir=str(index_dir))
+                index = load_index_from_storage(storage_context)
+                convert_legacy_index(index_dir, index)
+                return index
+
+    header, texts, records, embeddings = read_index(compact_path)
+    if header.get("embedding_model") != EMBED_MODEL_NAME:
+        raise ValueError(f"Index built with {header.get('embedding_model')}, re-index the document")
+    nodes = [node_from_record(t, r, e) for t, r, e in zip(texts, records, embeddings)]
+    # Nodes already carry their embeddings, so nothing is re-embedded here
+    return VectorStoreIndex(nodes)
+
+def convert_legacy_index(index_dir: Path, index):
+    """Rewrite a loaded legacy index in the compact format (caller holds legacy_lock)"""
+    try:
+        info = read_index_info(index_dir) or {}
+        nodes = list(index.docstore.docs.values())
+        for node in nodes:
+            node.embedding = index.vector_store.get(node.node_id)
+        save_compact_index(index_dir, nodes, {
+            key: info[key]
+            for key in ("paper_id", "pdf_path", "provider", "model_name", "pages", "pdf_sha256", "indexed_at")
+            if key in info
+        })
+        print(f"[RAG] Converted {index_dir} to the compact index format")
+    except Exception as e:
+        print(f"[RAG ERROR] Could not convert {index_dir} to the compact format: {str(e)}")
+
+def build_index(paper_id: int, pdf_path: str, index_dir: Path, provider: str, model_name: str,
+                pdf_hash: Optional[str] = None) -> Tuple[int, int]:
+    """Load, embed and persist a PDF (blocking, runs in the worker pool); returns (chunks, pages)"""
+    ensure_rag_ready()
+    from llama_index.core import SimpleDirectoryReader, Settings
+    from llama_index.core.schema import MetadataMode
+
+    # Create index directory
+    index_dir.mkdir(exist_ok=True)
+
+    # Load PDF
+    print(f"[RAG] Loading PDF: {pdf_path}")
+    with metrics.stage("pdf_parse"):
+        documents = SimpleDirectoryReader(input_files=[pdf_path]).load_data()
+
+    # Chunk and embed (what VectorStoreIndex.from_documents does, minus the JSON stores)
+    print(f"[RAG] Creating vector index for paper {paper_id}...")
+    with metrics.stage("chunking"):
+        nodes = Settings.node_parser.get_nodes_from_documents(documents, show_progress=True)
+    with metrics.stage("embedding"):
+        embeddings = Settings.embed_model.get_text_embedding_batch(
+            [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes],
+            show_progress=True
+        )
+    for node, embedding in zip(nodes, embeddings):
+        node.embedding = embedding
+
+    # Persist index
+    with metrics.stage("index_save"):
+        save_compact_index(index_dir, nodes, {
+            "paper_id": paper_id,
+            "pdf_path": pdf_path,
+            "provider": provider,
+            "model_name": model_name,
+            "pages": len(documents),
+            "pdf_sha256": pdf_hash or file_sha256(pdf_path),
+            "indexed_at": time.time()
+        })
+
+    return len(nodes), len(documents)
+
 @app.post("/index")
 async def index_document(req: IndexRequest):
     """Index a PDF document using LlamaIndex"""
@@ -99,66 +393,20 @@ async def index_document(req: IndexRequest):
 
         # Check if already indexed
         index_dir = get_index_dir(paper_id, pdf_path)
-        if index_dir.exists() and (index_dir / "docstore.json").exists():
-            # Load existing index to get chunk count
-            storage_context = StorageContext.from_defaults(persist_dir=str(index_dir))
-            index = load_index_from_storage(storage_context)
-
-            # Count chunks from docstore
-            docstore_path = index_dir / "docstore.json"
-            with open(docstore_path, 'r', encoding='utf-8') as f:
-                docstore = json.load(f)
-            chunks = len(docstore.get("docstore/data", {}))
-
+        info = await blocking_pool.run("io", read_index_info, index_dir)
+        if info:
             return {
                 "success": True,
                 "paper_id": paper_id,
                 "already_indexed": True,
-                "chunks": chunks,
+                "chunks": info["chunks"],
                 "message": "Document already indexed"
             }
 
-        # Create index directory
-        index_dir.mkdir(exist_ok=True)
-
-        # Load PDF
-        print(f"[RAG] Loading PDF: {pdf_path}")
-        documents = SimpleDirectoryReader(input_files=[pdf_path]).load_data()
-
-        # Create LLM
-        llm = create_llm(req.provider, req.model_name)
-        Settings.llm = llm
-
-        # Create index
-        print(f"[RAG] Creating vector index for paper {paper_id}...")
-        index = VectorStoreIndex.from_documents(
-            documents,
-            show_progress=True
+        chunks, _ = await blocking_pool.run(
+            "index", build_index, paper_id, pdf_path, index_dir, req.provider, req.model_name
         )
 
-        # Persist index
-        index.storage_context.persist(persist_dir=str(index_dir))
-
-        # Count chunks
-        docstore_path = index_dir / "docstore.json"
-        with open(docstore_path, 'r', encoding='utf-8') as f:
-            docstore = json.load(f)
-        chunks = len(docstore.get("docstore/data", {}))
-
-        # Save metadata
-        metadata = {
-            "paper_id": paper_id,
-            "pdf_path": pdf_path,
-            "provider": req.provider,
-            "model_name": req.model_name,
-            "chunks": chunks,
-            "indexed_at": time.time()
-        }
-
-        metadata_path = index_dir / "metadata.json"
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
-
         elapsed_time = time.time() - start_time
 
         return {
@@ -177,23 +425,78 @@ async def index_document(req: IndexRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error indexing document: {str(e)}")
 
+def find_index_dir(paper_id: int) -> Optional[Path]:
+    """Find the index directory of a paper inside backend/MyPapers"""
+    # Find folder containing this paper_id
+    for folder in PAPERS_DIR.iterdir():
+        if folder.is_dir() and f"_{paper_id}" in folder.name:
+            potential_index = folder / f"{paper_id}_llamaindex"
+            if potential_index.exists():
+                return potential_index
+    return None
+
+def run_query(index_dir: Path, question: str, provider: str, model_name: str,
+              budget_tokens: Optional[int] = None, streaming: bool = False):
+    """
+    Load a persisted index and query it (blocking, runs in the worker pool).
+    Retrieved chunks are de-duplicated and packed into the token budget left
+    after the question. With streaming=True, the returned response's
+    `response_gen` yields the LLM tokens lazily.
+    """
+    ensure_rag_ready()
+    from llama_index.core import Settings, QueryBundle, get_response_synthesizer
+
+    # Pooled LLM, passed explicitly so concurrent queries never share global state
+    llm = get_llm(provider, model_name)
+
+    # Load index
+    with metrics.stage("index_load"):
+        index = load_index(index_dir)
+
+    # Retrieve more candidates than we keep; the budget decides what is sent
+    with metrics.stage("embedding"):
+        query_embedding = Settings.embed_model.get_query_embedding(question)
+    with metrics.stage("retrieval"):
+        retriever = index.as_retriever(similarity_top_k=RETRIEVAL_TOP_K)
+        nodes = retriever.retrieve(QueryBundle(query_str=question, embedding=query_embedding))
+        nodes, context_stats = context_builder.select_chunks(
+            nodes, context_builder.chunk_budget(question, budget_tokens)
+        )
+    context_stats["budget_tokens"] = context_builder.budget_tokens if budget_tokens is None else budget_tokens
+    metrics.tokens("prompt", count_tokens(question) + context_stats["chunk_tokens"])
+
+    response_synthesizer = get_response_synthesizer(
+        llm=llm,
+        response_mode="compact",
+        streaming=streaming
+    )
+    if streaming:
+        # Generation happens while response_gen is consumed; timed by the caller
+        return response_synthesizer.synthesize(question, nodes), context_stats
+
+    with metrics.stage("llm"):
+        response = response_synthesizer.synthesize(question, nodes)
+    metrics.tokens("completion", count_tokens(str(response)))
+    return response, context_stats
+
+def format_sources(response) -> List[dict]:
+    """Extract source nodes info (the chunks kept by the context budget)"""
+    source_info = []
+    if hasattr(response, 'source_nodes'):
+        for node in response.source_nodes:
+            source_info.append({
+                "text": node.text[:200] + "..." if len(node.text) > 200 else node.text,
+                "score": float(node.score) if getattr(node, 'score', None) is not None else None
+            })
+    return source_info
+
 @app.post("/query")
 async def query_document(req: QueryRequest):
     """Query a document using LlamaIndex RAG"""
     try:
         paper_id = req.paper_id
 
-        # Find the paper's index directory
-        base_papers_dir = Path(__file__).parent.parent / "backend" / "MyPapers"
-
-        # Find folder containing this paper_id
-        index_dir = None
-        for folder in base_papers_dir.iterdir():
-            if folder.is_dir() and f"_{paper_id}" in folder.name:
-                potential_index = folder / f"{paper_id}_llamaindex"
-                if potential_index.exists():
-                    index_dir = potential_index
-                    break
+        index_dir = await blocking_pool.run("io", find_index_dir, paper_id)
 
         if not index_dir or not index_dir.exists():
             raise HTTPException(
@@ -201,59 +504,22 @@ async def query_document(req: QueryRequest):
                 detail=f"No index found for paper {paper_id}. Please index the document first."
             )
 
-        # Load metadata
-        metadata_path = index_dir / "metadata.json"
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        # Create LLM
-        llm = create_llm(req.provider, req.model_name)
-        Settings.llm = llm
-
-        # Load index
-        storage_context = StorageContext.from_defaults(persist_dir=str(index_dir))
-        index = load_index_from_storage(storage_context)
-
-        # Create query engine
-        query_engine = index.as_query_engine(
-            similarity_top_k=5,  # Retrieve top 5 most relevant chunks
-            response_mode="compact"
-        )
-
         # Build question with history context
-        question = req.question
-        if req.history and len(req.history) > 0:
-            # Add recent conversation context
-            context_parts = []
-            for msg in req.history[-4:]:  # Last 2 exchanges
-                role = "User" if msg.get("type") == "user" else "Assistant"
-                content = msg.get('content', '')
-                if content:
-                    context_parts.append(f"{role}: {content}")
-
-            if context_parts:
-                context_text = "\n".join(context_parts)
-                question = f"Previous conversation:\n{context_text}\n\nCurrent question: {req.question}"
+        question, history_stats = context_builder.build_question(req.question, req.history)
 
         # Query with RAG
         print(f"[RAG] Querying paper {paper_id}: {req.question}")
-        response = query_engine.query(question)
-
-        # Extract source nodes info
-        source_info = []
-        if hasattr(response, 'source_nodes'):
-            for node in response.source_nodes:
-                source_info.append({
-                    "text": node.text[:200] + "..." if len(node.text) > 200 else node.text,
-                    "score": float(node.score) if hasattr(node, 'score') else None
-                })
+        response, context_stats = await blocking_pool.run(
+            "query", run_query, index_dir, question, req.provider, req.model_name, req.context_budget
+        )
 
         return {
             "success": True,
             "paper_id": paper_id,
             "response": str(response),
-            "sources": source_info,
-            "question": req.question
+            "sources": format_sources(response),
+            "question": req.question,
+            "context": {**history_stats, **context_stats}
         }
 
     except Exception as e:
@@ -262,53 +528,109 @@ async def query_document(req: QueryRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error querying document: {str(e)}")
 
-@app.get("/status/{paper_id}")
-async def get_status(paper_id: int):
-    """Check if a document has been indexed"""
-    try:
-        # Search for index directory
-        base_papers_dir = Path(__file__).parent.parent / "backend" / "MyPapers"
-
-        for folder in base_papers_dir.iterdir():
-            if folder.is_dir() and f"_{paper_id}" in folder.name:
-                index_dir = folder / f"{paper_id}_llamaindex"
-                if index_dir.exists() and (index_dir / "docstore.json").exists():
-                    metadata_path = index_dir / "metadata.json"
-                    if metadata_path.exists():
-                        with open(metadata_path, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                        return {
-                            "paper_id": paper_id,
-                            "indexed": True,
-                            "chunks": metadata.get("chunks", 0),
-                            "indexed_at": metadata.get("indexed_at")
-                        }
+@app.post("/query/stream")
+async def query_document_stream(req: QueryRequest, request: Request):
+    """
+    Stream a RAG answer as Server-Sent Events: `sources` first, then one
+    `token` event per LLM chunk, then `done`. Closing the connection stops
+    the LLM generation.
+    """
+    paper_id = req.paper_id
+    index_dir = await blocking_pool.run("io", find_index_dir, paper_id)
+
+    if not index_dir or not index_dir.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"No index found for paper {paper_id}. Please index the document first."
+        )
+
+    question, history_stats = context_builder.build_question(req.question, req.history)
+
+    async def event_stream():
+        # The query slot is held for the whole generation, not per token
+        async with blocking_pool.limit("query"):
+            try:
+                print(f"[RAG] Streaming query for paper {paper_id}: {req.question}")
+                response, context_stats = await blocking_pool.execute(
+                    run_query, index_dir, question, req.provider, req.model_name,
+                    req.context_budget, streaming=True
+                )
+                yield sse_event("sources", {
+                    "paper_id": paper_id,
+                    "sources": format_sources(response),
+                    "context": {**history_stats, **context_stats}
+                })
 
+                llm_start = time.perf_counter()
+                answer_parts = []
+                try:
+                    async with aclosing(blocking_pool.iterate(response.response_gen)) as tokens:
+                        async for token in tokens:
+                            if not answer_parts:
+                                metrics.observe_stage("llm_first_token", time.perf_counter() - llm_start)
+                            answer_parts.append(token)
+                            if await request.is_disconnected():
+                                print(f"[RAG] Client disconnected, stopping generation for paper {paper_id}")
+                                return
+                            yield sse_event("token", {"token": token})
+                finally:
+                    metrics.observe_stage("llm", time.perf_counter() - llm_start)
+                    metrics.tokens("completion", count_tokens("".join(answer_parts)))
+
+                yield sse_event("done", {"paper_id": paper_id})
+
+            except Exception as e:
+                print(f"❌ Error streaming query: {str(e)}")
+                yield sse_event("error", {"detail": f"Error querying document: {str(e)}"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def read_status(paper_id: int) -> dict:
+    """Read indexing status from the index header"""
+    index_dir = find_index_dir(paper_id)
+    info = read_index_info(index_dir) if index_dir else None
+    if info:
         return {
             "paper_id": paper_id,
-            "indexed": False
+            "indexed": True,
+            "chunks": info.get("chunks", 0),
+            "indexed_at": info.get("indexed_at"),
+            "format": info["format"]
         }
 
+    return {
+        "paper_id": paper_id,
+        "indexed": False
+    }
+
+@app.get("/status/{paper_id}")
+async def get_status(paper_id: int):
+    """Check if a document has been indexed"""
+    try:
+        return await blocking_pool.run("io", read_status, paper_id)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking status: {str(e)}")
 
+def remove_index(paper_id: int) -> bool:
+    """Delete the index directory of a paper"""
+    index_dir = find_index_dir(paper_id)
+    if index_dir:
+        import shutil
+        shutil.rmtree(index_dir)
+        return True
+    return False
+
 @app.delete("/delete/{paper_id}")
 async def delete_index(paper_id: int):
     """Delete index for a paper"""
     try:
-        base_papers_dir = Path(__file__).parent.parent / "backend" / "MyPapers"
-
-        for folder in base_papers_dir.iterdir():
-            if folder.is_dir() and f"_{paper_id}" in folder.name:
-                index_dir = folder / f"{paper_id}_llamaindex"
-                if index_dir.exists():
-                    import shutil
-                    shutil.rmtree(index_dir)
-                    return {
-                        "success": True,
-                        "paper_id": paper_id,
-                        "message": "Index deleted successfully"
-                    }
+        if await blocking_pool.run("io", remove_index, paper_id):
+            return {
+                "success": True,
+                "paper_id": paper_id,
+                "message": "Index deleted successfully"
+            }
 
         return {
             "success": False,
@@ -319,14 +641,175 @@ async def delete_index(paper_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting index: {str(e)}")
 
+class BulkIndexRequest(BaseModel):
+    paper_ids: Optional[List[int]] = None
+    provider: str = "groq"
+    model_name: str = "llama-3.3-70b-versatile"
+    force: bool = False
+
+bulk_job = BulkIndexJob(Path(__file__).parent / "bulk_index_checkpoint.json")
+bulk_state = {"task": None}
+# Workers finish concurrently: one checkpoint writer at a time
+checkpoint_lock = asyncio.Lock()
+
+def record_pdf_hash(index_dir: Path, pdf_hash: str):
+    """Store the PDF hash of an index that has none (blocking)"""
+    with legacy_lock(index_dir):
+        compact_path = compact_index_path(index_dir)
+        if compact_path:
+            update_header(compact_path, {"pdf_sha256": pdf_hash})
+            return
+        metadata_path = index_dir / "metadata.json"
+        metadata = {}
+        if metadata_path.exists():
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        metadata["pdf_sha256"] = pdf_hash
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+def index_if_changed(paper_id: int, pdf_path: str, provider: str, model_name: str, force: bool) -> dict:
+    """Index one paper unless its index matches the current PDF hash (blocking)"""
+    start_time = time.time()
+    pdf_hash = file_sha256(pdf_path)
+    index_dir = get_index_dir(paper_id, pdf_path)
+
+    info = None if force else read_index_info(index_dir)
+    if info and info.get("pdf_sha256") in (None, pdf_hash):
+        if info.get("pdf_sha256") is None:
+            # Indexed (or converted) before hashes were recorded: adopt the
+            # current PDF so later runs notice when it changes
+            record_pdf_hash(index_dir, pdf_hash)
+        return {"status": "skipped", "chunks": info["chunks"]}
+
+    if index_dir.exists():
+        import shutil
+        shutil.rmtree(index_dir)
+
+    chunks, pages = build_index(paper_id, pdf_path, index_dir, provider, model_name, pdf_hash)
+    return {
+        "status": "done",
+        "chunks": chunks,
+        "pages": pages,
+        "seconds": round(time.time() - start_time, 2)
+    }
+
+async def save_checkpoint():
+    """Snapshot the bulk job and write its checkpoint, serialized across workers"""
+    async with checkpoint_lock:
+        await blocking_pool.run("io", bulk_job.write_checkpoint, bulk_job.checkpoint_text())
+
+async def run_bulk_job():
+    """Index every pending paper of the bulk job, checkpointing after each one"""
+    state = bulk_job.state
+    bulk_job.mark_running()
+    print(f"[RAG] Bulk indexing job {state['job_id']}: {len(bulk_job.pending())} papers to process")
+
+    async def process(paper: dict):
+        async with blocking_pool.limit("bulk"):
+            if state["status"] != "running":
+                return
+            paper_id = paper["paper_id"]
+            bulk_job.record(paper_id, status="running")
+            try:
+                result = await blocking_pool.execute(
+                    index_if_changed, paper_id, paper["pdf_path"],
+                    state["provider"], state["model_name"], state["force"]
+                )
+                bulk_job.record(paper_id, error=None, **result)
+            except Exception as e:
+                print(f"[RAG ERROR] Bulk indexing failed for paper {paper_id}: {str(e)}")
+                bulk_job.record(paper_id, status="failed", error=str(e))
+            try:
+                await save_checkpoint()
+            except Exception as e:
+                print(f"[RAG ERROR] Could not write bulk indexing checkpoint: {str(e)}")
+
+    await asyncio.gather(*(process(paper) for paper in bulk_job.pending()))
+
+    if state["status"] == "running":
+        bulk_job.finish("completed")
+    else:
+        # Papers interrupted mid-run go back to the queue for the next resume
+        for paper in bulk_job.pending():
+            bulk_job.record(paper["paper_id"], status="pending")
+    await save_checkpoint()
+    print(f"[RAG] Bulk indexing job {state['job_id']} {bulk_job.state['status']}: {bulk_job.status()['counts']}")
+
+def start_bulk_task():
+    bulk_state["task"] = asyncio.create_task(run_bulk_job())
+
+@app.on_event("startup")
+async def resume_bulk_job():
+    """Resume an unfinished bulk indexing job from its checkpoint"""
+    try:
+        if await blocking_pool.run("io", bulk_job.load):
+            print(f"[RAG] Resuming bulk indexing job {bulk_job.state['job_id']}")
+            start_bulk_task()
+    except Exception as e:
+        print(f"[RAG ERROR] Could not resume bulk indexing job: {str(e)}")
+
+@app.post("/bulk-index")
+async def start_bulk_index(req: BulkIndexRequest):
+    """Start indexing the whole library (or a list of paper IDs) in the background"""
+    if bulk_state["task"] is not None and not bulk_state["task"].done():
+        raise HTTPException(status_code=409, detail="A bulk indexing job is already running")
+
+    papers = await blocking_pool.run("io", discover_papers, PAPERS_DIR, req.paper_ids)
+    if not papers:
+        raise HTTPException(status_code=404, detail="No papers with a PDF found to index")
+
+    bulk_job.start(papers, req.provider, req.model_name, req.force)
+    await save_checkpoint()
+    start_bulk_task()
+    return {"success": True, **bulk_job.status()}
+
+@app.get("/bulk-index/status")
+async def bulk_index_status():
+    """Progress, throughput and ETA of the current (or last) bulk indexing job"""
+    return bulk_job.status()
+
+@app.post("/bulk-index/cancel")
+async def cancel_bulk_index():
+    """Stop the bulk job after the papers currently being indexed"""
+    if bulk_state["task"] is None or bulk_state["task"].done():
+        return {"success": False, "message": "No bulk indexing job running"}
+    bulk_job.finish("cancelled")
+    return {"success": True, **bulk_job.status()}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "service": "LlamaIndex RAG Service",
-        "groq_configured": config["groq_api_key"] is not None
+        "groq_configured": config["groq_api_key"] is not None,
+        "workers": blocking_pool.stats(),
+        "embedding_batches": embedding_batch_stats(),
+        "llm_pool": llm_pool.stats()
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of stage latencies, token counts and cache lookups"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 once LlamaIndex and the embedding model are loaded"""
+    body = {
+        "ready": rag_state["ready"],
+        "error": rag_state["error"],
+        "startup": startup_report()
     }
+    if not rag_state["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/startup")
+async def startup_timings():
+    """Breakdown of deferred import and warm-up costs"""
+    return startup_report()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5005)
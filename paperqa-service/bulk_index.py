@@ -0,0 +1,144 @@
+"""
+Bulk indexing of the paper library.
+
+A job covers every paper folder in backend/MyPapers (or an explicit list of
+IDs). Progress is checkpointed to a JSON file after each paper so that a
+restarted service resumes where it stopped; papers whose PDF hash matches
+the one recorded at indexing time are skipped.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discover_papers(papers_dir: Path, paper_ids: Optional[List[int]] = None) -> List[dict]:
+    """List {paper_id, pdf_path} for paper folders named `<title>_<id>` holding a PDF"""
+    wanted = set(paper_ids) if paper_ids else None
+    papers = []
+    for folder in sorted(papers_dir.iterdir()):
+        if not folder.is_dir():
+            continue
+        suffix = folder.name.rsplit("_", 1)[-1]
+        if not suffix.isdigit():
+            continue
+        paper_id = int(suffix)
+        if wanted is not None and paper_id not in wanted:
+            continue
+        pdf_files = sorted(p for p in folder.iterdir() if p.suffix.lower() == ".pdf")
+        if pdf_files:
+            papers.append({"paper_id": paper_id, "pdf_path": str(pdf_files[0])})
+    return papers
+
+
+class BulkIndexJob:
+    """State of the current bulk indexing job, persisted to a checkpoint file"""
+
+    def __init__(self, checkpoint_path: Path):
+        self.checkpoint_path = checkpoint_path
+        self.state = {"status": "idle", "papers": []}
+        # Wall-clock time since this process started (or resumed) the job
+        self._run_started = None
+        self._run_totals = {"papers": 0, "pages": 0, "chunks": 0}
+
+    def load(self) -> bool:
+        """Load the checkpoint; True if it holds an unfinished job"""
+        if not self.checkpoint_path.exists():
+            return False
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            self.state = json.load(f)
+        return self.state.get("status") == "running"
+
+    def start(self, papers: List[dict], provider: str, model_name: str, force: bool = False):
+        self.state = {
+            "job_id": uuid.uuid4().hex[:12],
+            "status": "running",
+            "provider": provider,
+            "model_name": model_name,
+            "force": force,
+            "started_at": time.time(),
+            "updated_at": time.time(),
+            "papers": [dict(paper, status="pending") for paper in papers]
+        }
+
+    def mark_running(self):
+        self._run_started = time.time()
+        self._run_totals = {"papers": 0, "pages": 0, "chunks": 0}
+
+    def pending(self) -> List[dict]:
+        return [p for p in self.state["papers"] if p["status"] in ("pending", "running")]
+
+    def record(self, paper_id: int, **fields):
+        for paper in self.state["papers"]:
+            if paper["paper_id"] == paper_id:
+                paper.update(fields)
+                if fields.get("status") == "done":
+                    self._run_totals["papers"] += 1
+                    self._run_totals["pages"] += fields.get("pages", 0)
+                    self._run_totals["chunks"] += fields.get("chunks", 0)
+        self.state["updated_at"] = time.time()
+
+    def finish(self, status: str):
+        self.state["status"] = status
+        self.state["updated_at"] = time.time()
+
+    def checkpoint_text(self) -> str:
+        return json.dumps(self.state, indent=2)
+
+    def write_checkpoint(self, text: str):
+        """Atomically replace the checkpoint file (blocking)"""
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def status(self) -> dict:
+        """Counts, throughput (pages/s, chunks/s) and ETA"""
+        papers = self.state.get("papers", [])
+        counts = {}
+        for paper in papers:
+            counts[paper["status"]] = counts.get(paper["status"], 0) + 1
+
+        indexed = [p for p in papers if p["status"] == "done"]
+        remaining = len(self.pending())
+
+        # Throughput is measured over this process's run, across all workers
+        pages_per_second = chunks_per_second = eta_seconds = None
+        elapsed = time.time() - self._run_started if self._run_started else 0.0
+        if elapsed > 0 and self._run_totals["papers"]:
+            pages_per_second = round(self._run_totals["pages"] / elapsed, 2)
+            chunks_per_second = round(self._run_totals["chunks"] / elapsed, 2)
+            if self.state.get("status") == "running":
+                eta_seconds = round(remaining * elapsed / self._run_totals["papers"], 1)
+
+        return {
+            "job_id": self.state.get("job_id"),
+            "status": self.state.get("status"),
+            "total": len(papers),
+            "counts": counts,
+            "remaining": remaining,
+            "pages_indexed": sum(p.get("pages", 0) for p in indexed),
+            "chunks_indexed": sum(p.get("chunks", 0) for p in indexed),
+            "pages_per_second": pages_per_second,
+            "chunks_per_second": chunks_per_second,
+            "eta_seconds": eta_seconds,
+            "started_at": self.state.get("started_at"),
+            "updated_at": self.state.get("updated_at"),
+            "failures": [
+                {"paper_id": p["paper_id"], "error": p.get("error")}
+                for p in papers if p["status"] == "failed"
+            ]
+        }
@@ -0,0 +1,216 @@
+"""
+Token-budgeted prompt assembly for chat queries.
+
+The chat history and the retrieved chunks share one token budget. Recent
+turns are kept verbatim, older turns are replaced by short cached
+summaries, and retrieved chunks are de-duplicated (exact copies and
+overlapping neighbours from the splitter) before being packed by score.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+# SentenceSplitter's default chunk size, and the chunk count the service used
+# to send before budgeting (similarity_top_k=5)
+CHUNK_SIZE_TOKENS = 1024
+CONTEXT_CHUNKS = 5
+QUESTION_TOKENS = 200
+PROMPT_RESERVE_TOKENS = 300
+
+_encoding = {"loaded": False, "value": None}
+
+
+def _get_encoding():
+    """cl100k_base tokenizer if tiktoken is usable, else None (chars/4 estimate)"""
+    if not _encoding["loaded"]:
+        _encoding["loaded"] = True
+        try:
+            import tiktoken
+            _encoding["value"] = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding["value"] = None
+    return _encoding["value"]
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in a string"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut a string to at most `max_tokens` tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]).rstrip() + "..."
+    if len(text) <= max_tokens * 4:
+        return text
+    return text[:max_tokens * 4].rstrip() + "..."
+
+
+def default_budget(history_budget_tokens: int, chunk_tokens: int = CHUNK_SIZE_TOKENS,
+                   chunks: int = CONTEXT_CHUNKS) -> int:
+    """Prompt budget leaving room for `chunks` full chunks next to a full history"""
+    return chunks * chunk_tokens + history_budget_tokens + QUESTION_TOKENS + PROMPT_RESERVE_TOKENS
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextBuilder:
+    """Fits chat history and retrieved chunks into a token budget"""
+
+    def __init__(self, budget_tokens: Optional[int] = None, history_budget_tokens: int = 800,
+                 recent_messages: int = 2, summary_tokens: int = 60,
+                 prompt_reserve_tokens: int = PROMPT_RESERVE_TOKENS, overlap_threshold: float = 0.6,
+                 cache_size: int = 512, on_summary_lookup: Optional[Callable[[bool], None]] = None):
+        self.budget_tokens = default_budget(history_budget_tokens) if budget_tokens is None else budget_tokens
+        self.history_budget_tokens = history_budget_tokens
+        self.recent_messages = recent_messages
+        self.summary_tokens = summary_tokens
+        self.prompt_reserve_tokens = prompt_reserve_tokens
+        self.overlap_threshold = overlap_threshold
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        # Called with True on a summary cache hit, False on a miss (metrics hook)
+        self.on_summary_lookup = on_summary_lookup
+
+    def summarize(self, role: str, content: str) -> str:
+        """Short extractive summary of one turn, cached by content hash"""
+        key = hashlib.sha1(f"{role}\0{content}".encode("utf-8")).hexdigest()
+        if key in self._summaries:
+            self._summaries.move_to_end(key)
+            if self.on_summary_lookup:
+                self.on_summary_lookup(True)
+            return self._summaries[key]
+        if self.on_summary_lookup:
+            self.on_summary_lookup(False)
+
+        # Leading sentences carry the gist of both questions and answers
+        sentences = re.split(r"(?<=[.!?])\s+", " ".join(content.split()))
+        summary = ""
+        for sentence in sentences:
+            candidate = f"{summary} {sentence}".strip()
+            if count_tokens(candidate) > self.summary_tokens:
+                break
+            summary = candidate
+        if not summary:
+            summary = truncate_tokens(sentences[0], self.summary_tokens)
+
+        self._summaries[key] = summary
+        if len(self._summaries) > self.cache_size:
+            self._summaries.popitem(last=False)
+        return summary
+
+    def build_question(self, question: str, history: Optional[List[dict]],
+                       history_budget_tokens: Optional[int] = None) -> Tuple[str, dict]:
+        """Prefix the question with history compressed to the history budget"""
+        budget = self.history_budget_tokens if history_budget_tokens is None else history_budget_tokens
+        turns = []
+        for msg in history or []:
+            content = (msg.get("content") or "").strip()
+            if content:
+                role = "User" if msg.get("type") == "user" else "Assistant"
+                turns.append((role, content))
+
+        recent = turns[-self.recent_messages:] if self.recent_messages else []
+        older = turns[:len(turns) - len(recent)]
+
+        # Recent turns verbatim (newest first gets the budget), then summaries
+        lines = []
+        used = 0
+        for role, content in reversed(recent):
+            remaining = budget - used
+            if remaining <= 0:
+                break
+            text = truncate_tokens(content, remaining)
+            line = f"{role}: {text}"
+            used += count_tokens(line)
+            lines.insert(0, line)
+
+        summarized = 0
+        for role, content in reversed(older):
+            line = f"{role} (summary): {self.summarize(role, content)}"
+            cost = count_tokens(line)
+            if used + cost > budget:
+                break
+            used += cost
+            summarized += 1
+            lines.insert(0, line)
+
+        stats = {
+            "history_tokens": used,
+            "history_turns": len(turns),
+            "summarized_turns": summarized,
+            "dropped_turns": len(turns) - len(lines)
+        }
+        if not lines:
+            return question, stats
+        context_text = "\n".join(lines)
+        return f"Previous conversation:\n{context_text}\n\nCurrent question: {question}", stats
+
+    def chunk_budget(self, question: str, budget_tokens: Optional[int] = None) -> int:
+        """Tokens left for retrieved chunks once the question is in the prompt"""
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+        return max(0, budget - count_tokens(question) - self.prompt_reserve_tokens)
+
+    def select_chunks(self, nodes: list, budget_tokens: int) -> Tuple[list, dict]:
+        """
+        Keep the best-scoring retrieved nodes that fit the budget, skipping
+        exact duplicates and chunks mostly contained in an already kept one.
+        Kept nodes are returned in retrieval order.
+        """
+        ranked = sorted(
+            enumerate(nodes),
+            key=lambda item: item[1].score if item[1].score is not None else 0.0,
+            reverse=True
+        )
+        kept = []
+        kept_shingles = []
+        used = 0
+        duplicates = 0
+        over_budget = 0
+        for position, node in ranked:
+            text = node.text
+            shingles = _shingles(text)
+            overlapping = any(
+                shingles and other and
+                len(shingles & other) / min(len(shingles), len(other)) >= self.overlap_threshold
+                for other in kept_shingles
+            )
+            if overlapping:
+                duplicates += 1
+                continue
+            cost = count_tokens(text)
+            if used + cost > budget_tokens:
+                over_budget += 1
+                continue
+            used += cost
+            kept.append((position, node))
+            kept_shingles.append(shingles)
+
+        kept.sort(key=lambda item: item[0])
+        stats = {
+            "chunk_tokens": used,
+            "chunk_budget_tokens": budget_tokens,
+            "chunks_retrieved": len(nodes),
+            "chunks_used": len(kept),
+            "chunks_duplicate": duplicates,
+            "chunks_over_budget": over_budget
+        }
+        return [node for _, node in kept], stats
@@ -0,0 +1,139 @@
+"""
+Dynamic micro-batching of embedding calls.
+
+Worker threads that embed at the same time (concurrent chat queries, bulk
+indexing workers) hand their texts to one dispatcher thread. It waits up to
+`max_wait_ms` for more requests, runs a single batched forward pass of up to
+`max_batch_size` texts, and hands each caller its own slice of the result.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+Embedding = List[float]
+
+
+class EmbeddingBatcher:
+    """Collects embedding requests from many threads into batched calls"""
+
+    def __init__(self, embed_fn: Callable[[List[str]], List[Embedding]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0, name: str = "embed"):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._requests: "queue.Queue[tuple]" = queue.Queue()
+        self._counters = {"requests": 0, "texts": 0, "batches": 0}
+        self._thread = threading.Thread(target=self._dispatch, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, texts: List[str]) -> List[Embedding]:
+        """Embed texts, sharing the forward pass with concurrent callers (blocking)"""
+        if not texts:
+            return []
+        future: Future = Future()
+        self._requests.put((list(texts), future))
+        return future.result()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._requests.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            # Gather whatever arrives before the deadline, up to the batch size
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    texts, future = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append((texts, future))
+                size += len(texts)
+
+            all_texts = [text for texts, _ in batch for text in texts]
+            try:
+                embeddings = self.embed_fn(all_texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self._counters["requests"] += len(batch)
+            self._counters["texts"] += len(all_texts)
+            self._counters["batches"] += 1
+
+            offset = 0
+            for texts, future in batch:
+                future.set_result(embeddings[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def stats(self) -> dict:
+        batches = self._counters["batches"]
+        return {
+            **self._counters,
+            "avg_batch_texts": round(self._counters["texts"] / batches, 2) if batches else 0.0,
+            "avg_batch_requests": round(self._counters["requests"] / batches, 2) if batches else 0.0,
+            "queued": self._requests.qsize()
+        }
+
+
+def batched_embedding(base_model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+    """
+    Wrap a LlamaIndex embedding model so query and text embeddings go through
+    EmbeddingBatcher. Queries and passages are batched separately since some
+    models embed them with different instructions.
+    """
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+    from llama_index.core.bridge.pydantic import PrivateAttr
+
+    def _query_batch(texts: List[str]) -> List[Embedding]:
+        # HuggingFaceEmbedding embeds a list of queries in one pass with the query prompt
+        embed = getattr(base_model, "_embed", None)
+        if embed is not None:
+            try:
+                return embed(texts, prompt_name="query")
+            except TypeError:
+                pass
+        return [base_model.get_query_embedding(t) for t in texts]
+
+    class BatchedEmbedding(BaseEmbedding):
+        _base = PrivateAttr()
+        _queries = PrivateAttr()
+        _texts = PrivateAttr()
+
+        def __init__(self):
+            super().__init__(model_name=base_model.model_name, embed_batch_size=base_model.embed_batch_size)
+            self._base = base_model
+            self._queries = EmbeddingBatcher(
+                _query_batch, max_batch_size, max_wait_ms, name="query-embed"
+            )
+            self._texts = EmbeddingBatcher(
+                base_model.get_text_embedding_batch, max_batch_size, max_wait_ms, name="text-embed"
+            )
+
+        @classmethod
+        def class_name(cls) -> str:
+            return "BatchedEmbedding"
+
+        def _get_query_embedding(self, query: str) -> Embedding:
+            return self._queries.embed([query])[0]
+
+        async def _aget_query_embedding(self, query: str) -> Embedding:
+            import asyncio
+            return await asyncio.to_thread(self._get_query_embedding, query)
+
+        def _get_text_embedding(self, text: str) -> Embedding:
+            return self._texts.embed([text])[0]
+
+        def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+            return self._texts.embed(texts)
+
+        def batch_stats(self) -> dict:
+            return {"query": self._queries.stats(), "text": self._texts.stats()}
+
+    return BatchedEmbedding()
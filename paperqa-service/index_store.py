@@ -0,0 +1,147 @@
+"""
+Compact, versioned on-disk format for per-paper LlamaIndex indexes.
+
+One file, `index.fpidx`, replaces LlamaIndex's pretty-printed JSON stores:
+
+    magic    8 bytes   b"FPRAGIDX"
+    u32      header length, then the header as UTF-8 JSON
+    u64      length of the zlib-compressed chunk texts; once decompressed,
+             each chunk is a u32 byte length followed by its UTF-8 text
+    u64      length of the zlib-compressed per-chunk metadata (JSON list)
+    float32  embeddings, chunk_count x dimensions, little-endian
+
+The header (format version, chunk count, embedding model, dimensions, PDF
+hash, indexing info) is readable without touching the body, so status
+checks stay cheap. Integers are little-endian.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+INDEX_FILE = "index.fpidx"
+MAGIC = b"FPRAGIDX"
+FORMAT_VERSION = 1
+
+
+class IndexFormatError(ValueError):
+    """Raised when an index file is not in a supported compact format"""
+
+
+def _pack_texts(texts: List[str]) -> bytes:
+    parts = []
+    for text in texts:
+        encoded = text.encode("utf-8")
+        parts.append(struct.pack("<I", len(encoded)))
+        parts.append(encoded)
+    return zlib.compress(b"".join(parts), 6)
+
+
+def _unpack_texts(blob: bytes, count: int) -> List[str]:
+    data = zlib.decompress(blob)
+    texts = []
+    offset = 0
+    for _ in range(count):
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        texts.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def write_index(path: Path, header: dict, texts: List[str], chunk_metadata: List[dict],
+                embeddings: List[List[float]]):
+    """Write chunks, their metadata and embeddings with a header (blocking)"""
+    if not (len(texts) == len(chunk_metadata) == len(embeddings)):
+        raise ValueError("texts, chunk_metadata and embeddings must have the same length")
+    dimensions = len(embeddings[0]) if embeddings else 0
+
+    header = dict(header, format_version=FORMAT_VERSION, chunk_count=len(texts), dimensions=dimensions)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    texts_blob = _pack_texts(texts)
+    meta_blob = zlib.compress(json.dumps(chunk_metadata, ensure_ascii=False).encode("utf-8"), 6)
+
+    vectors = array("f")
+    for embedding in embeddings:
+        if len(embedding) != dimensions:
+            raise ValueError("all embeddings must have the same dimensions")
+        vectors.extend(embedding)
+    if sys.byteorder != "little":
+        vectors.byteswap()
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(struct.pack("<Q", len(texts_blob)))
+        f.write(texts_blob)
+        f.write(struct.pack("<Q", len(meta_blob)))
+        f.write(meta_blob)
+        vectors.tofile(f)
+    tmp_path.replace(path)
+
+
+def _read_header(f) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise IndexFormatError("not a compact index file")
+    (header_length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("format_version", 0) > FORMAT_VERSION:
+        raise IndexFormatError(f"unsupported index format version {header.get('format_version')}")
+    return header
+
+
+def read_header(path: Path) -> dict:
+    """Read only the header of a compact index"""
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def read_index(path: Path) -> Tuple[dict, List[str], List[dict], List[List[float]]]:
+    """Read header, chunk texts, chunk metadata and embeddings (blocking)"""
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        count = header["chunk_count"]
+        dimensions = header["dimensions"]
+
+        (texts_length,) = struct.unpack("<Q", f.read(8))
+        texts = _unpack_texts(f.read(texts_length), count)
+        (meta_length,) = struct.unpack("<Q", f.read(8))
+        chunk_metadata = json.loads(zlib.decompress(f.read(meta_length)).decode("utf-8"))
+
+        vectors = array("f")
+        vectors.frombytes(f.read(count * dimensions * 4))
+        if sys.byteorder != "little":
+            vectors.byteswap()
+
+    embeddings = [vectors[i * dimensions:(i + 1) * dimensions].tolist() for i in range(count)]
+    return header, texts, chunk_metadata, embeddings
+
+
+def update_header(path: Path, updates: dict) -> dict:
+    """Merge `updates` into the header of a compact index, keeping its body (blocking)"""
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        body = f.read()
+    header.update(updates)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(body)
+    tmp_path.replace(path)
+    return header
+
+
+def compact_index_path(index_dir: Path) -> Optional[Path]:
+    """Path of the compact index in `index_dir`, if there is one"""
+    path = index_dir / INDEX_FILE
+    return path if path.exists() else None
@@ -0,0 +1,62 @@
+"""
+Keyed pool of long-lived LLM clients and settings.
+
+Building a client per request means a fresh HTTP connection pool (and TLS
+handshake) for every query. Clients are instead created once per
+(provider, model, base_url, key) and reused, so their keep-alive
+connections carry over between requests. The pool is shared by concurrent
+requests, which receive their client explicitly instead of through global
+state.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+
+def secret_fingerprint(secret) -> str:
+    """Short hash of an API key, so keys never appear in pool keys or stats"""
+    if not secret:
+        return ""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+
+
+class ClientPool:
+    """Thread-safe, size-capped cache of clients built on first use"""
+
+    def __init__(self, max_size: int = 16, on_lookup: Optional[Callable[[bool], None]] = None):
+        self.max_size = max_size
+        # Called with True on a hit, False on a miss (metrics hook)
+        self.on_lookup = on_lookup
+        self._clients: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Tuple, factory: Callable[[], object]):
+        """Return the client for `key`, building it with `factory` if needed"""
+        with self._lock:
+            hit = key in self._clients
+            if hit:
+                self._clients.move_to_end(key)
+                self._counters["hits"] += 1
+                client = self._clients[key]
+            else:
+                client = factory()
+                self._clients[key] = client
+                self._counters["misses"] += 1
+                if len(self._clients) > self.max_size:
+                    self._clients.popitem(last=False)
+                    self._counters["evictions"] += 1
+
+        if self.on_lookup:
+            self.on_lookup(hit)
+        return client
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "size": len(self._clients),
+                "keys": [list(map(str, key)) for key in self._clients]
+            }
@@ -0,0 +1,190 @@
+"""
+Built-in metrics for the RAG services, exposed in Prometheus text format.
+
+No client library or collector is needed: histograms and counters live in
+process and `/metrics` renders them on demand. Stage timings observed while
+serving a request are also kept per request, so they can be returned in a
+`Server-Timing` header.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# Stage timings of the request being served: list of (stage, seconds)
+_request_timings: contextvars.ContextVar = contextvars.ContextVar("request_timings", default=None)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                labels = dict(zip(self.labelnames, key))
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                    lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Metrics:
+    """Metrics of one service: stage latencies, LLM token counts, cache lookups"""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.stage_seconds = Histogram(
+            "formpaper_stage_seconds", "Duration of pipeline stages",
+            ["service", "stage"], SECONDS_BUCKETS
+        )
+        self.request_seconds = Histogram(
+            "formpaper_http_request_seconds", "HTTP request latency",
+            ["service", "method", "route", "status"], SECONDS_BUCKETS
+        )
+        self.llm_tokens = Histogram(
+            "formpaper_llm_tokens", "Tokens per LLM call",
+            ["service", "kind"], TOKEN_BUCKETS
+        )
+        self.cache_requests = Counter(
+            "formpaper_cache_requests_total", "Cache lookups by result",
+            ["service", "cache", "result"]
+        )
+        # Callables returning (name, labels, value) for counters kept elsewhere
+        self._collectors: List[Callable[[], List[Tuple[str, Dict[str, str], float]]]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage (PDF parse, chunking, embedding, retrieval, LLM...)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def observe_stage(self, name: str, seconds: float):
+        self.stage_seconds.observe(seconds, service=self.service, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def tokens(self, kind: str, count: Optional[int]):
+        """Record prompt or completion token counts of one LLM call"""
+        if count:
+            self.llm_tokens.observe(count, service=self.service, kind=kind)
+
+    def cache(self, cache: str, result: str):
+        """Record a cache lookup; result is usually 'hit' or 'miss'"""
+        self.cache_requests.inc(service=self.service, cache=cache, result=result)
+
+    def add_collector(self, collector: Callable[[], List[Tuple[str, Dict[str, str], float]]]):
+        """Expose counters maintained by another component (client pools, batchers...)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in (self.stage_seconds, self.request_seconds, self.llm_tokens, self.cache_requests):
+            lines.extend(metric.render())
+
+        collected: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception:
+                continue
+            for name, labels, value in samples:
+                labels = {"service": self.service, **labels}
+                collected.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name, samples in sorted(collected.items()):
+            lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    async def track_request(self, request, call_next, timing_headers: bool = False):
+        """Middleware body: request latency plus optional Server-Timing header"""
+        timings = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            _request_timings.reset(token)
+            route = request.scope.get("route")
+            self.request_seconds.observe(
+                time.perf_counter() - start,
+                service=self.service,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            )
+
+        if timing_headers or request.headers.get("x-timing") == "1":
+            entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+            entries.append(f"total;dur={(time.perf_counter() - start) * 1000:.1f}")
+            response.headers["Server-Timing"] = ", ".join(entries)
+        return response
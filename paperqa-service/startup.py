@@ -0,0 +1,55 @@
+"""
+Startup-time accounting for the RAG services.
+
+Heavy dependencies (torch, sentence-transformers, LlamaIndex, PaperQA) are
+imported on first use instead of at module import, so uvicorn accepts
+connections immediately. Every deferred import and warm-up step is timed
+here and exposed through `startup_report()`.
+"""
+
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+process_started = time.perf_counter()
+
+# step name -> seconds, in the order the steps completed
+startup_timings = {}
+
+
+def timed_import(name: str):
+    """Import a module, recording its cost the first time it is loaded"""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    startup_timings.setdefault(f"import {name}", time.perf_counter() - start)
+    return module
+
+
+@contextmanager
+def timed_step(name: str):
+    """Record the duration of a non-import warm-up step"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings.setdefault(name, time.perf_counter() - start)
+
+
+def startup_report() -> dict:
+    """Per-step startup cost, most expensive first"""
+    steps = sorted(startup_timings.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "uptime_seconds": round(time.perf_counter() - process_started, 3),
+        "total_seconds": round(sum(startup_timings.values()), 3),
+        "steps": [{"name": name, "seconds": round(seconds, 3)} for name, seconds in steps]
+    }
+
+
+def print_startup_report(prefix: str):
+    report = startup_report()
+    print(f"{prefix} Warm-up finished in {report['total_seconds']}s")
+    for step in report["steps"]:
+        print(f"{prefix}   {step['seconds']:>8.3f}s  {step['name']}")
@@ -0,0 +1,19 @@
+"""
+Server-Sent Events helpers for the streaming query endpoints.
+
+Events sent, in order: `sources` (retrieved chunks, before any token),
+`token` (one per LLM chunk), then `done` or `error`.
+"""
+
+import json
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
@@ -0,0 +1,106 @@
+"""
+Bounded worker pool shared by the RAG services.
+
+Blocking work (PDF parsing, embedding, index loading, synchronous LLM calls,
+file I/O) is pushed to a thread pool so the event loop stays free for
+/health and /status. Each operation gets its own concurrency limit, and
+waiting callers are counted so queue depth can be reported.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+
+class BlockingPool:
+    """Thread pool with per-operation concurrency limits and queue-depth counters"""
+
+    def __init__(self, limits: Dict[str, int], default_limit: int = 1, max_workers: Optional[int] = None):
+        self.limits = {op: max(1, int(n)) for op, n in limits.items()}
+        self.default_limit = max(1, default_limit)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or sum(self.limits.values()) + self.default_limit,
+            thread_name_prefix="rag-worker"
+        )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._queued: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        if operation not in self._semaphores:
+            limit = self.limits.setdefault(operation, self.default_limit)
+            self._semaphores[operation] = asyncio.Semaphore(limit)
+            self._queued[operation] = 0
+            self._running[operation] = 0
+        return self._semaphores[operation]
+
+    @asynccontextmanager
+    async def limit(self, operation: str):
+        """Hold one slot of `operation` (also usable around native async work)"""
+        semaphore = self._semaphore(operation)
+        self._queued[operation] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued[operation] -= 1
+        self._running[operation] += 1
+        try:
+            yield
+        finally:
+            self._running[operation] -= 1
+            semaphore.release()
+
+    async def execute(self, func: Callable, *args, **kwargs):
+        """Run a blocking callable in the pool; the caller must already hold a slot"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (per-request timings) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(context.run, func, *args, **kwargs))
+
+    async def run(self, operation: str, func: Callable, *args, **kwargs):
+        """Run a blocking callable in the pool under the limit of `operation`"""
+        async with self.limit(operation):
+            return await self.execute(func, *args, **kwargs)
+
+    async def iterate(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Pull items from a blocking iterator (e.g. an LLM token generator) in the
+        pool. The caller must already hold a slot. If the consumer stops early
+        or is cancelled, the iterator is closed so the underlying call stops.
+        """
+        done = object()
+        pending = None
+        context = contextvars.copy_context()
+        try:
+            while True:
+                pending = self.executor.submit(context.run, next, iterator, done)
+                item = await asyncio.wrap_future(pending)
+                pending = None
+                if item is done:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                if pending is not None and not pending.done():
+                    # A generator cannot be closed while next() runs in a worker
+                    pending.add_done_callback(lambda _: close())
+                else:
+                    close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Limit, running and queued counts for every operation"""
+        return {
+            op: {
+                "limit": limit,
+                "running": self._running.get(op, 0),
+                "queued": self._queued.get(op, 0)
+            }
+            for op, limit in self.limits.items()
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)